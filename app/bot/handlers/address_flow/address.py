@@ -17,6 +17,7 @@ from bot.states.address_state import AddressState
 from bot.utils import tg_sem_show_service_menu
 from config import settings
 from exceptions import VoeDownException
+from services.directory import search_houses, search_streets
 from services.fetcher import fetch_cities, fetch_houses, fetch_streets
 from services.models import City, House, ItemBase, Street
 
@@ -37,6 +38,7 @@ async def address_search_step(
     model_cls: Type[ItemBase],
     state_key: str,
     keyboard_builder: Callable[[list], InlineKeyboardMarkup],
+    local_search: Callable | None = None,
 ):
     logger.info(f"Address search step started for chat_id={message.chat.id}")
     
@@ -65,17 +67,31 @@ async def address_search_step(
             old_msg_id=message_id,
         )
 
-        try:
-            response = await fetcher(**fetch_kwargs, query=query)
-        except VoeDownException:
-            return await tg_sem_show_service_menu(
-                bot=bot,
-                chat_id=chat_id,
-                text="VOE впав 😢. Спробуйте пізніше...",
-                reply_markup=back_to_main_menu_keyboard(),
-            )
-
-    if not response:
+        # Local directory first, VOE autocomplete if it has no answer
+        objects = None
+        if local_search is not None:
+            objects = await local_search(**fetch_kwargs, query=query)
+
+        if objects is None:
+            try:
+                response = await fetcher(**fetch_kwargs, query=query)
+            except VoeDownException:
+                response = None
+            if response:
+                objects = [model_cls.from_api(data) for data in response]
+            elif local_search is not None:
+                # Maybe a typo, suggest similar names from the directory
+                objects = await local_search(**fetch_kwargs, query=query, fuzzy=True)
+
+            if response is None and not objects:
+                return await tg_sem_show_service_menu(
+                    bot=bot,
+                    chat_id=chat_id,
+                    text="VOE впав 😢. Спробуйте пізніше...",
+                    reply_markup=back_to_main_menu_keyboard(),
+                )
+
+    if not objects:
         return await tg_sem_show_service_menu(
             bot=bot,
             chat_id=chat_id,
@@ -84,8 +100,7 @@ async def address_search_step(
             old_msg_id=message_id,
         )
 
-    logger.info(f"Fetched {len(response)} items for \"{query}\" {looking_for} search in chat_id={chat_id}")
-    objects = [model_cls.from_api(data) for data in response]
+    logger.info(f"Fetched {len(objects)} items for \"{query}\" {looking_for} search in chat_id={chat_id}")
     await state.update_data({state_key: [obj.model_dump() for obj in objects]})
 
     return await tg_sem_show_service_menu(
@@ -129,6 +144,7 @@ async def choose_street_handler(message: Message, state: FSMContext):
         "Введіть виключно назву вулиці без номеру будинку.\n"
         "Перевірте чи існує така вулиця в базі VOE.",
         fetcher=fetch_streets,
+        local_search=search_streets,
         fetch_kwargs={"city_id": city.id},
         model_cls=Street,
         state_key="streets",
@@ -150,6 +166,7 @@ async def choose_house_handler(message: Message, state: FSMContext):
         empty_result_text="Будинок не знайдено. <i>Напишіть ще раз номер будинку</i>.\n"
         "Перевірте чи існує такий номер будинку в базі VOE.",
         fetcher=fetch_houses,
+        local_search=search_houses,
         fetch_kwargs={"street_id": chosen_street.id},
         model_cls=House,
         state_key="houses",
@@ -20,8 +20,10 @@ from bot.utils import (
 from config import settings
 from exceptions import VoeDownException
 from logger import create_logger
-from services import fetch_schedule, parse_schedule, render_schedule
-from services.models import Address, City, House, ScheduleResponse, Street, TextResult
+from services import render_schedule
+from services.models import Address, City, House, Street, TextResult
+from services.schedule_cache import get_schedule
+from services.utils.cpu_pool import cpu_pool
 from storage import subscription_storage, user_storage
 
 logger = create_logger(__name__)
@@ -223,9 +225,7 @@ async def select_address_callback(callback: CallbackQuery, state: FSMContext):
         )
 
         try:
-            raw = await fetch_schedule(
-                address.city.id, address.street.id, address.house.id
-            )
+            cached = await get_schedule(address.id, address.name)
         except VoeDownException:
             return await tg_sem_show_service_menu(
                 bot=callback.bot,
@@ -235,9 +235,7 @@ async def select_address_callback(callback: CallbackQuery, state: FSMContext):
                 old_msg_id=callback.message.message_id,
             )
 
-        parsed = parse_schedule(raw, address.name, max_days=2)
-
-        if not parsed.disconnections:
+        if cached is None or not cached.schedule.disconnections:
             return await tg_sem_show_service_menu(
                 bot=callback.bot,
                 chat_id=callback.message.chat.id,
@@ -246,12 +244,10 @@ async def select_address_callback(callback: CallbackQuery, state: FSMContext):
                 old_msg_id=callback.message.message_id,
             )
 
-    await user_storage.set_cached_schedule(address.id, parsed, ttl=600)
-
     await tg_sem_show_service_menu(
         bot=callback.bot,
         chat_id=callback.message.chat.id,
-        text=f"{address.name}",
+        text=f"{address.name}\n{cached.age_label}",
         reply_markup=day_list_keyboard(address.id),
         old_msg_id=callback.message.message_id,
     )
@@ -268,19 +264,15 @@ async def day_select_callback(callback: CallbackQuery, state: FSMContext):
     day_offset = int(day_offset)
     date = (datetime.now() + timedelta(days=day_offset))
 
-    schedule_data = await user_storage.get_cached_schedule(addr_id)
-
-    if not schedule_data:
+    address = await user_storage.get_address_by_id(callback.from_user.id, addr_id)
+    if not address:
         return await tg_sem_show_service_menu(
             bot=callback.bot,
             chat_id=callback.message.chat.id,
-            text="Графік відключень не знайдено в кеші. Будь ласка, завантажте його знову.",
-            reply_markup=full_address_keyboard(addr_id),
+            text="Вибрана адреса не знайдена. Спробуйте ще раз.",
             old_msg_id=callback.message.message_id,
         )
 
-    schedule = ScheduleResponse.model_validate(schedule_data)
-
     async with ChatActionSender(
         bot=callback.bot, chat_id=callback.message.chat.id, action=ChatAction.TYPING
     ):
@@ -291,6 +283,27 @@ async def day_select_callback(callback: CallbackQuery, state: FSMContext):
             old_msg_id=callback.message.message_id,
         )
 
+        try:
+            cached = await get_schedule(addr_id, address.name)
+        except VoeDownException:
+            return await tg_sem_show_service_menu(
+                bot=callback.bot,
+                chat_id=callback.message.chat.id,
+                text="VOE впав 😢",
+                reply_markup=full_address_keyboard(addr_id),
+                old_msg_id=callback.message.message_id,
+            )
+
+        if cached is None:
+            return await tg_sem_show_service_menu(
+                bot=callback.bot,
+                chat_id=callback.message.chat.id,
+                text=f"Графік відключень для {address.name} відсутній.",
+                reply_markup=full_address_keyboard(addr_id),
+                old_msg_id=callback.message.message_id,
+            )
+        schedule = cached.schedule
+
         logger.debug(schedule)
         day = schedule.get_day_schedule(date)
 
@@ -310,7 +323,8 @@ async def day_select_callback(callback: CallbackQuery, state: FSMContext):
                 reply_markup=day_list_keyboard(addr_id),
             )
 
-        rendered_schedule = render_schedule(
+        rendered_schedule = await cpu_pool.run(
+            render_schedule,
             day=day,
             is_text_enabled=await user_storage.is_render_text_enabled(
                 callback.from_user.id
@@ -344,7 +358,7 @@ async def day_select_callback(callback: CallbackQuery, state: FSMContext):
         return await tg_sem_replace_service_menu(
             bot=callback.bot,
             chat_id=callback.message.chat.id,
-            text=f"{schedule.address}",
+            text=f"{schedule.address}\n{cached.age_label}",
             reply_markup=day_list_keyboard(addr_id),
         )
 
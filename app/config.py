@@ -26,14 +26,193 @@ class Fetcher(BaseSettings):
 
 class Flare(BaseSettings):
     url: str = "http://flaresolver:8191/v1"
-    operating_mode: Literal["cookie", "proxy"] = "proxy"
+    # Several FlareSolverr instances to spread sessions over (defaults to `url`)
+    urls: list[str] = []
+    # hybrid: direct requests with cf_clearance, proxy when the challenge
+    # can't be passed or direct requests cost more
+    operating_mode: Literal["cookie", "proxy", "hybrid"] = "proxy"
+    # Prefix of session names, sessions are named "{session}-{n}"
     session: str = "voe-session"
+    pool_size: int = 2
+    pool_strategy: Literal["round_robin", "least_loaded"] = "least_loaded"
+    max_session_uses: int = 200
+    health_check_interval: int = 300
+
+
+class Hybrid(BaseSettings):
+    window: int = 50
+    min_samples: int = 5
+    # Switch to proxy when fewer direct requests pass the challenge
+    min_success_rate: float = 0.5
+    # Seconds between direct probe requests while proxy is preferred
+    probe_interval: int = 60
+
+
+class Clearance(BaseSettings):
+    # Re-solve the challenge this many seconds before cf_clearance expires
+    refresh_before: int = 900
+    # Cloudflare may stop accepting the cookie long before it expires
+    max_age: int = 6 * 3600
+    check_interval: int = 60
+    # Pick up clearance solved by other replicas
+    reload_interval: int = 30
+    # Wait this long for another replica to solve the challenge
+    solve_timeout: int = 180
+
+
+class Cassette(BaseSettings):
+    # record: save every VOE response, replay: answer from the recording
+    mode: Literal["off", "record", "replay"] = "off"
+    # Not "path", nested settings would read the PATH variable
+    file: str = "cassettes/voe.cassette"
+    # Replay latency multiplier, 0 answers immediately
+    latency_scale: float = 1.0
+
+
+class Http(BaseSettings):
+    timeout: float = 150
+    http2: bool = True
+
+    # Connection pool limits shared by every request to the same upstream
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 60
+
+    # Resolve DNS and open the first connection during bot startup
+    prewarm: bool = True
+
+
+class Limiter(BaseSettings):
+    initial: int = 3
+    min_limit: int = 1
+    max_limit: int = 20
+    # Average latency (seconds) above which upstream is considered congested
+    latency_target: float = 5.0
+
+
+class PriorityWeights(BaseSettings):
+    # Share of freed slots each priority gets while all of them are waiting
+    interactive: int = 16
+    notification_tomorrow: int = 4
+    notification_today: int = 2
+    background: int = 1
+
+
+class Concurrency(BaseSettings):
+    # Direct httpx requests with cf_clearance cookie
+    cookie: Limiter = Limiter()
+    # Requests through FlareSolverr browser
+    proxy: Limiter = Limiter(initial=1, max_limit=5, latency_target=30.0)
+
+    window: int = 20
+    min_samples: int = 5
+    error_rate_target: float = 0.1
+    decrease_factor: float = 0.5
+    cooldown: float = 5.0
+
+    priority: PriorityWeights = PriorityWeights()
+
+
+class TokenBucket(BaseSettings):
+    # Tokens (requests) per second refilled for the whole cluster
+    rate: float = 2.0
+    burst: int = 5
+    # Tokens only interactive requests may take, must be less than burst
+    interactive_reserve: int = 2
+
+
+class RateLimit(BaseSettings):
+    enabled: bool = True
+    schedule: TokenBucket = TokenBucket(rate=5.0, burst=10)
+    autocomplete: TokenBucket = TokenBucket()
+
+
+class Deadlines(BaseSettings):
+    # Seconds a fetch may take in total, including queueing and retries
+    interactive: float = 60
+    notification_tomorrow: float = 180
+    notification_today: float = 180
+    background: float = 300
+
+
+class Retry(BaseSettings):
+    max_retries: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+
+    deadline: Deadlines = Deadlines()
+
+    # Retries may be at most this share of requests over the window
+    budget_ratio: float = 0.2
+    budget_window: int = 60
+    budget_min_retries: int = 5
+
+
+class CircuitBreaker(BaseSettings):
+    enabled: bool = True
+    # Open when this share of the recent `window` calls failed
+    failure_rate: float = 0.5
+    window: int = 20
+    min_calls: int = 5
+    # Seconds to fail fast before a probe request is let through
+    open_timeout: int = 60
+
+
+class Coalescing(BaseSettings):
+    # Share in-flight requests between replicas through Redis
+    shared: bool = True
+    lock_ttl: int = 60
+    result_ttl: int = 5
+    poll_interval: float = 0.25
+
+
+class AutocompleteCache(BaseSettings):
+    enabled: bool = True
+    lru_size: int = 2048
+    ttl: int = 7 * 24 * 3600
+    # Empty answers and 404 are cached for a shorter time
+    negative_ttl: int = 3600
+
+
+class Directory(BaseSettings):
+    enabled: bool = True
+    # Cities whose streets and houses are crawled into the local directory
+    cities: list[int] = [510100000]
+    interval: int = 600
+    refresh_interval: int = 7 * 24 * 3600
+    max_streets_per_run: int = 20
+
+    # Autocomplete prefix which returns this many items is expanded,
+    # a parent with such prefixes of max length left is marked incomplete
+    expand_threshold: int = 10
+    max_prefix_length: int = 4
+
+    search_limit: int = 20
+    fuzzy_threshold: float = 0.5
+    reload_interval: int = 300
+
+
+class ScheduleCache(BaseSettings):
+    # Served without touching VOE, refreshed in background once older
+    fresh_ttl: int = 900
+    # Last known good copy is kept for when VOE is down
+    retention: int = 2 * 24 * 3600
+    # zstd for large entries, only if every replica has zstandard installed
+    compress: bool = False
 
 
 class Notification(BaseSettings):
     silent_hash_recalculation: bool = False
     interval: int = 900
 
+    # Fetch a few representative houses per disconnection queue
+    # and fan their schedule out to the rest of the queue
+    queue_polling: bool = True
+    representatives_per_queue: int = 1
+    # Every address is still fetched directly once in a while
+    verify_interval: int = 6 * 3600
+    max_verifications_per_tick: int = 50
+
 
 class Redis(BaseSettings):
     host: str = "redis"
@@ -66,6 +245,17 @@ class MessagesLoading(BaseSettings):
     loading_schedule: str = "Завантаження графіка відключень..."
 
 
+class CpuPool(BaseSettings):
+    # thread: lxml and PIL release the GIL in places,
+    # process: no GIL at all at the cost of pickling inputs and results
+    kind: Literal["thread", "process"] = "thread"
+    workers: int = 2
+    # Jobs waiting for a worker, callers wait for room beyond that
+    max_queue: int = 32
+    # Workers the notification worker can't occupy, kept for bot handlers
+    interactive_reserve: int = 1
+
+
 class Renderer(BaseSettings):
     color_header: tuple[int, int, int] = (63, 111, 134)
     color_grid: tuple[int, int, int, int] = (13, 13, 13, 100)
@@ -93,9 +283,22 @@ class Settings(BaseSettings):
     fetcher: Fetcher = Fetcher()
     redis: Redis = Redis()
     flare: Flare = Flare()
+    clearance: Clearance = Clearance()
+    hybrid: Hybrid = Hybrid()
+    http: Http = Http()
+    cassette: Cassette = Cassette()
+    concurrency: Concurrency = Concurrency()
+    rate_limit: RateLimit = RateLimit()
+    retry: Retry = Retry()
+    circuit_breaker: CircuitBreaker = CircuitBreaker()
+    coalescing: Coalescing = Coalescing()
+    autocomplete_cache: AutocompleteCache = AutocompleteCache()
+    directory: Directory = Directory()
+    schedule_cache: ScheduleCache = ScheduleCache()
     notification: Notification = Notification()
     webhook: Webhook = Webhook()
     messages_loading: MessagesLoading = MessagesLoading()
+    cpu_pool: CpuPool = CpuPool()
     renderer: Renderer = Renderer()
 
 
@@ -1,3 +1,27 @@
 class VoeDownException(Exception):
     """Base exception for VoeDown errors."""
-    pass
\ No newline at end of file
+    pass
+
+
+class CircuitOpenException(VoeDownException):
+    """VOE is considered down, request was not sent."""
+    pass
+
+
+class DeadlineExceededException(VoeDownException):
+    """VOE did not answer within the deadline of the call."""
+
+    def __init__(self, message: str, upstream: bool = False) -> None:
+        super().__init__(message)
+        # Deadline ran out waiting for VOE, not in local queues
+        self.upstream = upstream
+
+
+class ChallengeException(Exception):
+    """Cloudflare challenge could not be solved."""
+    pass
+
+
+class CassetteMissException(VoeDownException):
+    """Request was not recorded in the replayed cassette."""
+    pass
@@ -14,7 +14,12 @@ from aiohttp import web
 from bot.handlers import register_handlers
 from config import settings
 from logger import create_logger, init_logging
+from services.directory_worker import directory_worker
 from services.notification_worker import notification_worker
+from services.utils.clearance import clearance_worker
+from services.utils.cpu_pool import cpu_pool
+from services.utils.flare_pool import flare_pool
+from services.utils.http_clients import close_http_clients, start_http_clients
 from storage import fsm_storage
 from watchfiles import run_process
 
@@ -68,6 +73,11 @@ def setup_bot() -> tuple[Bot, Dispatcher]:
     register_handlers(dp)
     
     async def on_startup(bot: Bot) -> None:
+        logger.info("Opening upstream HTTP connections...")
+        await start_http_clients()
+        await flare_pool.start()
+        cpu_pool.start()
+
         logger.info("Starting notification worker...")
         
         
@@ -78,6 +88,16 @@ def setup_bot() -> tuple[Bot, Dispatcher]:
 
         dp["notification_worker"] = task
 
+        if settings.flare.operating_mode in ("cookie", "hybrid"):
+            dp["clearance_worker"] = asyncio.create_task(
+                clearance_worker(interval_seconds=settings.clearance.check_interval)
+            )
+
+        if settings.directory.enabled:
+            dp["directory_worker"] = asyncio.create_task(
+                directory_worker(interval_seconds=settings.directory.interval)
+            )
+
         if settings.bot_mode == "webhook":
             logger.info("Setting webhook...")
             await bot.set_webhook(
@@ -89,15 +109,19 @@ def setup_bot() -> tuple[Bot, Dispatcher]:
     async def on_shutdown(bot: Bot) -> None:
         logger.info("Shutting down bot...")
 
-        task: Optional[asyncio.Task] = dp.get("notification_worker")
+        for name in ("notification_worker", "directory_worker", "clearance_worker"):
+            task: Optional[asyncio.Task] = dp.get(name)
 
-        if task:
-            task.cancel()
-            try:
-                await task
-            except asyncio.CancelledError:
-                pass
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
 
+        await flare_pool.close()
+        cpu_pool.close()
+        await close_http_clients()
         await bot.session.close()
         
     
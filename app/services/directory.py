@@ -0,0 +1,161 @@
+import bisect
+import time
+
+from config import settings
+from logger import create_logger
+
+from .models import House, Street
+from .utils.directory_helpers import normalize_name, trigrams
+
+logger = create_logger(__name__)
+
+
+class DirectoryIndex:
+    """
+    In-memory search index over street or house names of one parent.
+    Prefix match on every word of the normalized name,
+    trigram similarity as a fallback for typos.
+    An incomplete index may miss items the crawl couldn't reach.
+    """
+
+    def __init__(self, items: dict[int, str], complete: bool = True) -> None:
+        self.items = items
+        self.complete = complete
+        self._normalized = {
+            item_id: normalize_name(name) for item_id, name in items.items()
+        }
+
+        # Sorted (word, item_id) pairs for prefix lookups
+        self._words = sorted(
+            (word, item_id)
+            for item_id, norm in self._normalized.items()
+            for word in norm.split()
+        )
+
+        self._trigrams: dict[str, set[int]] = {}
+        for item_id, norm in self._normalized.items():
+            for gram in trigrams(norm):
+                self._trigrams.setdefault(gram, set()).add(item_id)
+
+    def _prefix_ids(self, prefix: str) -> set[int]:
+        start = bisect.bisect_left(self._words, (prefix,))
+        ids = set()
+        for word, item_id in self._words[start:]:
+            if not word.startswith(prefix):
+                break
+            ids.add(item_id)
+        return ids
+
+    def _sort_key(self, query: str):
+        def key(item_id: int):
+            norm = self._normalized[item_id]
+            return norm != query, len(norm), self.items[item_id]
+
+        return key
+
+    def search(self, query: str, limit: int, fuzzy: bool = True) -> list[int]:
+        """
+        Items whose words start with the query words. If there are none
+        and `fuzzy` is set, items with names similar to the query.
+        """
+        query = normalize_name(query)
+        if not query:
+            return []
+
+        # Every query word has to be a prefix of some word of the name
+        ids: set[int] | None = None
+        for word in query.split():
+            word_ids = self._prefix_ids(word)
+            ids = word_ids if ids is None else ids & word_ids
+            if not ids:
+                break
+
+        if ids:
+            return sorted(ids, key=self._sort_key(query))[:limit]
+        if not fuzzy:
+            return []
+
+        query_grams = trigrams(query)
+        scores: dict[int, int] = {}
+        for gram in query_grams:
+            for item_id in self._trigrams.get(gram, ()):
+                scores[item_id] = scores.get(item_id, 0) + 1
+
+        threshold = len(query_grams) * settings.directory.fuzzy_threshold
+        matches = [item_id for item_id, score in scores.items() if score >= threshold]
+        matches.sort(key=lambda item_id: -scores[item_id])
+        return matches[:limit]
+
+
+# (kind, parent_id) -> (loaded_at, index)
+_indexes: dict[tuple[str, int], tuple[float, DirectoryIndex]] = {}
+
+
+def set_index(
+    kind: str, parent_id: int, items: dict[int, str], complete: bool = True
+) -> None:
+    _indexes[(kind, parent_id)] = (time.monotonic(), DirectoryIndex(items, complete))
+
+
+async def _get_index(kind: str, parent_id: int) -> DirectoryIndex | None:
+    cached = _indexes.get((kind, parent_id))
+    if cached and time.monotonic() - cached[0] < settings.directory.reload_interval:
+        return cached[1]
+
+    # storage imports services.models, so import it lazily to avoid a cycle
+    from storage import directory_storage
+
+    # Other replicas may have crawled it, reload from Redis
+    crawled = await directory_storage.get_crawled_at(kind)
+    if parent_id not in crawled:
+        return None
+
+    items = await directory_storage.get_items(kind, parent_id)
+    complete = await directory_storage.is_complete(kind, parent_id)
+    set_index(kind, parent_id, items, complete)
+    return _indexes[(kind, parent_id)][1]
+
+
+def _search(index: DirectoryIndex | None, query: str | None, fuzzy: bool) -> list[int]:
+    # Items missing from an incomplete index can only be found in VOE
+    if index is None or not (index.complete or fuzzy):
+        return []
+    return index.search(query or "", settings.directory.search_limit, fuzzy)
+
+
+async def search_streets(
+    city_id: int, query: str | None, fuzzy: bool = False
+) -> list[Street] | None:
+    """
+    Search streets of the city in the local directory.
+    Returns None if the city is not crawled completely or no street name
+    starts with the query, so the caller can fall back to VOE autocomplete.
+    With `fuzzy` similar names are matched too, for when VOE has no answer.
+    """
+    if not settings.directory.enabled:
+        return None
+
+    index = await _get_index("streets", city_id)
+    ids = _search(index, query, fuzzy)
+    return [Street(id=i, name=index.items[i]) for i in ids] or None
+
+
+async def search_houses(
+    street_id: int, query: str | None, fuzzy: bool = False
+) -> list[House] | None:
+    """
+    Search houses of the street in the local directory, same as streets.
+    Streets which are not crawled yet are queued for the directory worker.
+    """
+    if not settings.directory.enabled:
+        return None
+
+    index = await _get_index("houses", street_id)
+    if index is None:
+        from storage import directory_storage
+
+        await directory_storage.add_pending(street_id)
+        return None
+
+    ids = _search(index, query, fuzzy)
+    return [House(id=i, name=index.items[i]) for i in ids] or None
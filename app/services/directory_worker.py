@@ -0,0 +1,147 @@
+import asyncio
+import string
+import time
+from typing import Awaitable, Callable, Type
+
+from config import settings
+from exceptions import VoeDownException
+from logger import create_logger
+from services.directory import set_index
+from services.fetcher import fetch_houses, fetch_streets
+from services.models import House, ItemBase, Street
+from storage import directory_storage
+
+logger = create_logger(__name__)
+
+CYRILLIC = "абвгґдеєжзиіїйклмнопрстуфхцчшщьюя"
+STREET_ALPHABET = CYRILLIC + string.digits
+# House names start with a number or a letter ("Б", "ДНЗ 5"),
+# numbers go on with letters and building parts ("12а", "12/1")
+HOUSE_FIRST_CHARS = string.digits[1:] + CYRILLIC + string.ascii_lowercase
+HOUSE_NEXT_CHARS = string.digits + CYRILLIC + "/-"
+
+
+async def _crawl(
+    fetcher: Callable[..., Awaitable[list]],
+    parent_id: int,
+    model_cls: Type[ItemBase],
+    first_chars: str,
+    next_chars: str,
+) -> tuple[dict[int, str], bool]:
+    """
+    Collect all items of the parent by querying autocomplete with prefixes.
+    A prefix that returns a full page is expanded with one more character.
+    Return the items and whether the crawl is complete, i.e. no prefix
+    still returned a full page at the max prefix length.
+    """
+    items: dict[int, str] = {}
+    complete = True
+    prefixes = list(first_chars)
+
+    while prefixes:
+        prefix = prefixes.pop(0)
+        response = await fetcher(
+            parent_id, prefix, cached=False, priority="background"
+        )
+
+        for data in response:
+            try:
+                item = model_cls.from_api(data)
+            except (ValueError, TypeError, KeyError):
+                logger.warning(f"Skipping malformed autocomplete item: {data}")
+                continue
+            items[item.id] = item.name
+
+        if len(response) < settings.directory.expand_threshold:
+            continue
+        if len(prefix) < settings.directory.max_prefix_length:
+            prefixes.extend(prefix + ch for ch in next_chars)
+        else:
+            logger.warning(
+                f"Prefix {prefix!r} of {parent_id} still returns a full page, "
+                "directory is incomplete"
+            )
+            complete = False
+
+    return items, complete
+
+
+async def _refresh_streets() -> None:
+    crawled_at = await directory_storage.get_crawled_at("streets")
+    stale_before = time.time() - settings.directory.refresh_interval
+
+    for city_id in settings.directory.cities:
+        if crawled_at.get(city_id, 0) > stale_before:
+            continue
+
+        logger.info(f"Crawling streets of city {city_id}")
+        streets, complete = await _crawl(
+            fetch_streets, city_id, Street, STREET_ALPHABET, STREET_ALPHABET
+        )
+        await directory_storage.set_items(
+            "streets", city_id, streets, time.time(), complete
+        )
+        set_index("streets", city_id, streets, complete)
+        logger.info(f"Crawled {len(streets)} streets of city {city_id}")
+
+
+async def _refresh_houses() -> None:
+    limit = settings.directory.max_streets_per_run
+
+    # Streets users are searching in right now go first
+    street_ids = await directory_storage.pop_pending(limit)
+    pending = set(street_ids)
+
+    crawled_at = await directory_storage.get_crawled_at("houses")
+    stale_before = time.time() - settings.directory.refresh_interval
+
+    known: list[int] = []
+    for city_id in settings.directory.cities:
+        known.extend(await directory_storage.get_items("streets", city_id))
+
+    stale = sorted(
+        (s for s in known if crawled_at.get(s, 0) <= stale_before),
+        key=lambda s: crawled_at.get(s, 0),
+    )
+    for street_id in stale:
+        if len(street_ids) >= limit:
+            break
+        if street_id not in street_ids:
+            street_ids.append(street_id)
+
+    for street_id in street_ids:
+        try:
+            houses, complete = await _crawl(
+                fetch_houses, street_id, House, HOUSE_FIRST_CHARS, HOUSE_NEXT_CHARS
+            )
+            await directory_storage.set_items(
+                "houses", street_id, houses, time.time(), complete
+            )
+        except BaseException:
+            # Popped streets not crawled yet go first on the next run
+            for pending_id in pending:
+                await directory_storage.add_pending(pending_id)
+            raise
+        pending.discard(street_id)
+        set_index("houses", street_id, houses, complete)
+        logger.debug(f"Crawled {len(houses)} houses of street {street_id}")
+
+    if street_ids:
+        logger.info(f"Directory worker crawled houses of {len(street_ids)} streets")
+
+
+async def directory_worker(interval_seconds: int = 600) -> None:
+    """
+    Crawl street and house lists of configured cities into the local directory.
+    Streets are refreshed as a whole, houses a few streets per run.
+    """
+    while True:
+        try:
+            await _refresh_streets()
+            await _refresh_houses()
+        except VoeDownException:
+            logger.warning("VOE is down, directory crawl postponed")
+        except Exception as e:
+            logger.exception("Directory worker run failed %s", e)
+
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,140 @@
+from logger import create_logger
+from lxml import etree
+
+from .models import CurrentDisconnection, DaySlots, ScheduleResponse
+from .models.day_slots import HOURS
+from .utils.parser_helpers import (
+    confirm_from_classes,
+    current_disconnection_info,
+    parse_css_var,
+    parse_day_label,
+)
+
+logger = create_logger(__name__)
+
+NO_QUEUE_INFO = "Немає інформації про чергу відключень"
+
+_QUEUE_TEXT = etree.XPath(
+    "//div[contains(@class,'disconnection-detailed-table')]//p//text()"
+)
+_CONTAINER = etree.XPath(
+    "(//div[contains(@class, 'disconnection-detailed-table-container')])[1]"
+)
+
+
+class MarkupMismatch(ValueError):
+    """Schedule markup is not what the fast parser expects."""
+
+
+def _fill_element(cell):
+    for el in cell.iterdescendants("div"):
+        cls = el.get("class")
+        if cls and "fill" in cls.split():
+            return el
+    return None
+
+
+def _pack_cell(day: DaySlots, cell) -> None:
+    classes = cell.get("class").split()
+    has_disconnection = "has_disconnection" in classes
+    full_off = has_disconnection and "full_hour" in classes
+    confirm = confirm_from_classes(classes)
+
+    if full_off:
+        day.has_disconnections = True
+        day.add_hour(confirm, True, True, confirm, True)
+        return
+
+    left_off = right_off = False
+    half_confirm = None
+    if has_disconnection:
+        fill = _fill_element(cell)
+        if fill is not None:
+            style = fill.get("style", "")
+            start_pct = parse_css_var(style, "start") or 0
+            size_pct = parse_css_var(style, "size") or 0
+
+            start_min = int(start_pct * 60 / 100)
+            end_min = min(60, int((start_pct + size_pct) * 60 / 100))
+            left_off = start_min < 30 and end_min > 0
+            right_off = start_min < 60 and end_min > 30
+
+            fill_cls = fill.get("class")
+            half_confirm = confirm_from_classes(fill_cls.split() if fill_cls else [])
+            if left_off or right_off:
+                day.has_disconnections = True
+
+    day.add_hour(confirm, left_off, right_off, half_confirm, False)
+
+
+def pack_days(container) -> list[DaySlots]:
+    """
+    Walk the schedule table once, collecting day labels and hour cells.
+    Cells are assigned to days in order, 24 per day.
+    """
+    labels: list[str] = []
+    cells = []
+    for el in container.iterchildren("div"):
+        cls = el.get("class")
+        if not cls:
+            continue
+        if "day_col" in cls:
+            if len(el) or not el.text:
+                raise MarkupMismatch(f"Unexpected day label markup: {cls}")
+            labels.append(el.text)
+        tokens = cls.split()
+        if "cell" in tokens and "disconnection-detailed-table-cell" in tokens:
+            cells.append(el)
+
+    days = []
+    for i, label in enumerate(labels):
+        day = DaySlots(parse_day_label(label))
+        for cell in cells[i * HOURS : (i + 1) * HOURS]:
+            _pack_cell(day, cell)
+        days.append(day)
+    return days
+
+
+def parse_schedule_fast(html: str, address_name: str) -> ScheduleResponse:
+    """
+    Parse the schedule in a single walk over the table.
+    Produces the same result as the XPath parser or raises MarkupMismatch.
+    """
+    tree = etree.HTML(html)
+    if tree is None:
+        raise MarkupMismatch("Empty document")
+
+    queue_nodes = [str(node).strip() for node in _QUEUE_TEXT(tree)]
+    if not queue_nodes:
+        return ScheduleResponse(
+            address=address_name,
+            disconnection_queue=NO_QUEUE_INFO,
+            disconnections=[],
+            current_disconnection=None,
+        )
+
+    queue = queue_nodes[0]
+    current_disconnection: CurrentDisconnection = current_disconnection_info(
+        queue_nodes[1:]
+    )
+
+    containers = _CONTAINER(tree)
+    days = pack_days(containers[0]) if containers else []
+    if not days:
+        return ScheduleResponse(
+            address=address_name,
+            disconnection_queue=queue,
+            disconnections=[],
+            current_disconnection=None,
+        )
+
+    disconnections = []
+    if any(day.has_disconnections for day in days):
+        disconnections = [day.to_day_schedule() for day in days]
+
+    return ScheduleResponse(
+        current_disconnection=current_disconnection,
+        address=address_name,
+        disconnection_queue=queue,
+        disconnections=disconnections,
+    )
@@ -1,78 +1,97 @@
-import json
+from urllib.parse import urlencode
 
 import httpx
-from bs4 import BeautifulSoup
-from config import settings
 from logger import create_logger
 from exceptions import VoeDownException
 
+from .utils.ajax_payload import insert_html
+from .utils.autocomplete_cache import AutocompleteCache, normalize_query
+from .utils.concurrency import Priority
 from .utils.fetch_wrapper import fetch
+from .utils.single_flight import SingleFlight
 
 logger = create_logger(__name__)
 
+schedule_flight = SingleFlight("schedule")
+autocomplete_flight = SingleFlight("autocomplete")
+autocomplete_cache = AutocompleteCache()
 
-async def fetch_cities(query: str | None):
-    url = "/autocomplete/read_city"
+
+async def _fetch_autocomplete(
+    url: str, query: str | None, kind: str, priority: Priority = "interactive"
+) -> list:
     params = {"q": query}
     try:
-        r = await fetch(url, params=params)
+        r = await fetch(url, params=params, priority=priority)
     except httpx.HTTPStatusError as e:
-        logger.error("Failed to fetch cities: %s", e)
-        if e.response.status_code >= 500:
-            raise VoeDownException
-        return []
-    logger.info(r)
-
-    if settings.flare.operating_mode == "proxy":
-        soup = BeautifulSoup(r["solution"]["response"], "lxml")
-        pre = soup.find("pre")
-        if not pre:
-            raise ValueError("No pre found in AJAX drupal response")
-        return json.loads(pre.text)
+        # Nothing found, cached as an empty answer
+        if e.response.status_code == 404:
+            return []
+        # Anything else (e.g. 403 after a failed clearance renewal) says
+        # nothing about the query, so it must not be cached
+        logger.error("Failed to fetch %s: %s", kind, e)
+        raise VoeDownException from e
 
     return r
 
 
-async def fetch_streets(city_id: int | None, query: str | None):
+async def _cached_autocomplete(
+    kind: str,
+    parent_id: int | None,
+    url: str,
+    query: str | None,
+    cached: bool = True,
+    priority: Priority = "interactive",
+) -> list:
+    query = normalize_query(query)
+
+    if cached:
+        value = await autocomplete_cache.get(kind, parent_id, query)
+        if value is not None:
+            return value
+
+    async def load() -> list:
+        result = await _fetch_autocomplete(url, query, kind, priority)
+        await autocomplete_cache.set(kind, parent_id, query, result)
+        return result
+
+    return await autocomplete_flight.do(
+        f"{url}?{urlencode({'q': query})}", load, priority
+    )
+
+
+async def fetch_cities(query: str | None):
+    url = "/autocomplete/read_city"
+    return await _cached_autocomplete("cities", None, url, query)
+
+
+async def fetch_streets(
+    city_id: int | None,
+    query: str | None,
+    cached: bool = True,
+    priority: Priority = "interactive",
+):
     url = f"/autocomplete/read_street/{city_id}"
-    params = {"q": query}
-    try:
-        r = await fetch(url, params=params)
-    except httpx.HTTPStatusError as e:
-        logger.error("Failed to fetch streets: %s", e)
-        if e.response.status_code >= 500:
-            raise VoeDownException
-        return []
-
-    if settings.flare.operating_mode == "proxy":
-        soup = BeautifulSoup(r["solution"]["response"], "lxml")
-        pre = soup.find("pre")
-        if not pre:
-            raise ValueError("No pre found in AJAX drupal response")
-        return json.loads(pre.text)
-    return r
+    return await _cached_autocomplete(
+        "streets", city_id, url, query, cached, priority
+    )
 
 
-async def fetch_houses(street_id: int | None, query: str | None):
+async def fetch_houses(
+    street_id: int | None,
+    query: str | None,
+    cached: bool = True,
+    priority: Priority = "interactive",
+):
     url = f"/autocomplete/read_house/{street_id}"
-    params = {"q": query}
-    try:
-        r = await fetch(url, params=params)
-    except httpx.HTTPStatusError as e:
-        logger.error("Failed to fetch houses: %s", e)
-        if e.response.status_code >= 500:
-            raise VoeDownException
-        return []
-    if settings.flare.operating_mode == "proxy":
-        soup = BeautifulSoup(r["solution"]["response"], "lxml")
-        pre = soup.find("pre")
-        if not pre:
-            raise ValueError("No pre found in AJAX drupal response")
-        return json.loads(pre.text)
-    return r
+    return await _cached_autocomplete(
+        "houses", street_id, url, query, cached, priority
+    )
 
 
-async def fetch_schedule(city_id: int, street_id: int, house_id: int) -> str:
+async def _fetch_schedule(
+    city_id: int, street_id: int, house_id: int, priority: Priority
+) -> str:
     # url = "/disconnection/detailed"
     url = ""
 
@@ -92,19 +111,36 @@ async def fetch_schedule(city_id: int, street_id: int, house_id: int) -> str:
     }
 
     try:
-        r = await fetch(url, params=params, data=data, method="POST")
+        r = await fetch(
+            url,
+            params=params,
+            data=data,
+            method="POST",
+            bucket="schedule",
+            priority=priority,
+        )
     except httpx.HTTPStatusError as e:
         logger.error("Failed to fetch schedule: %s", e)
-        if e.response.status_code >= 500:
+        if e.response.status_code >= 500 or e.response.status_code == 429:
             raise VoeDownException
         return ""
 
-    if settings.flare.operating_mode == "proxy":
-        soup = BeautifulSoup(r["solution"]["response"], "lxml")
-        textarea = soup.find("textarea")
-        if not textarea:
-            raise ValueError("No textarea found in AJAX drupal response")
-        return json.loads(textarea.text)[3]["data"]
-
-    value = next((item for item in r if item.get("command","") == "insert"))
-    return value["data"]
+    return insert_html(r)
+
+
+async def fetch_schedule(
+    city_id: int,
+    street_id: int,
+    house_id: int,
+    priority: Priority = "interactive",
+) -> str:
+    """
+    Fetch schedule HTML for the address.
+    Concurrent requests for the same address share one upstream request,
+    unless it was queued with a less urgent priority.
+    """
+    return await schedule_flight.do(
+        f"{city_id}-{street_id}-{house_id}",
+        lambda: _fetch_schedule(city_id, street_id, house_id, priority),
+        priority,
+    )
@@ -1,4 +1,4 @@
-from .address_models import Address, City, House, ItemBase, Street
+from .address_models import Address, City, House, ItemBase, Street, intern_address
 from .parser_models import (
     CurrentDisconnection,
     DaySchedule,
@@ -7,6 +7,7 @@ from .parser_models import (
     HourCell,
     ScheduleResponse,
 )
+from .day_slots import DaySlots
 from .renderer_models import ImageResult, RenderedSchedule, TextResult
 
 __all__ = [
@@ -15,7 +16,9 @@ __all__ = [
     "Street",
     "House",
     "DaySchedule",
+    "DaySlots",
     "ItemBase",
+    "intern_address",
     "HourCell",
     "HalfCell",
     "FullCell",
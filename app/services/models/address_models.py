@@ -1,10 +1,22 @@
 import re
+from functools import cached_property
 from typing import Self
+from weakref import WeakValueDictionary
 
-from pydantic import BaseModel, ValidationError, computed_field
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    ValidationError,
+    computed_field,
+    model_validator,
+)
+
+_CITY_NAME = re.compile(r"(.+)\s\(")
 
 
 class ItemBase(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     name: str
     id: int
 
@@ -34,19 +46,46 @@ class House(ItemBase): ...
 
 
 class Address(BaseModel):
+    # Frozen, so that id and name computed once stay valid and
+    # interned instances can be shared between users
+    model_config = ConfigDict(frozen=True)
+
     city: City
     street: Street
     house: House
 
+    @model_validator(mode="after")
+    def _compute_identity(self) -> Self:
+        # Read on every keyboard, lookup and log line, compute them once
+        self.id
+        self.name
+        return self
+
     @computed_field
-    @property
+    @cached_property
     def id(self) -> str:
         return f"{self.city.id}-{self.street.id}-{self.house.id}"
 
     @computed_field
-    @property
+    @cached_property
     def name(self) -> str:
-        match = re.search(r'(.+)\s\(', self.city.name)
+        match = _CITY_NAME.search(self.city.name)
         if match:
             return f"{match.group(1)}, {self.street.name}, {self.house.name}"
         return f"{self.city.name[:10]}, {self.street.name}, {self.house.name}"
+
+
+# Addresses in use by id, popular houses are saved by thousands of users
+_interned: WeakValueDictionary[str, Address] = WeakValueDictionary()
+
+
+def intern_address(address: Address) -> Address:
+    """
+    Return the shared instance equal to `address`. It replaces the one
+    registered under its id if that differs (e.g. a renamed street).
+    """
+    current = _interned.get(address.id)
+    if current is not None and current == address:
+        return current
+    _interned[address.id] = address
+    return address
@@ -0,0 +1,250 @@
+from datetime import datetime
+from functools import lru_cache
+
+from pydantic import TypeAdapter
+
+from .parser_models import DaySchedule, FullCell, HalfCell, HourCell
+
+HOURS = 24
+
+_DATETIME = TypeAdapter(datetime)
+
+# "HH:MM" at the start of every half hour, slot 48 is the next midnight
+_SLOT_TIMES = [
+    f"{(m // 60) % 24:02d}:{m % 60:02d}" for m in range(0, HOURS * 60 + 1, 30)
+]
+
+State = tuple[bool, bool | None]
+
+
+class DaySlots:
+    """
+    One day of the schedule as bitmaps, bit i is the i-th half hour
+    (or the i-th hour for `full_*`). Confirm state is three-valued:
+    set in `*_confirmed` is True, in `*_unconfirmed` is False, else None.
+
+    Times are derived from the slot index, so a day takes a few ints
+    instead of ~100 pydantic objects. Converts to and from DaySchedule
+    without losing anything.
+    """
+
+    __slots__ = (
+        "date",
+        "hours",
+        "has_disconnections",
+        "half_off",
+        "half_confirmed",
+        "half_unconfirmed",
+        "full_off",
+        "full_confirmed",
+        "full_unconfirmed",
+    )
+
+    def __init__(
+        self,
+        date: datetime,
+        has_disconnections: bool = False,
+        hours: int = 0,
+        full_off: int = 0,
+        full_confirmed: int = 0,
+        full_unconfirmed: int = 0,
+        half_off: int = 0,
+        half_confirmed: int = 0,
+        half_unconfirmed: int = 0,
+    ) -> None:
+        self.date = date
+        self.has_disconnections = has_disconnections
+        self.hours = hours
+        self.full_off = full_off
+        self.full_confirmed = full_confirmed
+        self.full_unconfirmed = full_unconfirmed
+        self.half_off = half_off
+        self.half_confirmed = half_confirmed
+        self.half_unconfirmed = half_unconfirmed
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, DaySlots):
+            return NotImplemented
+        return self.dump() == other.dump()
+
+    def __repr__(self) -> str:
+        return f"DaySlots({self.date:%Y-%m-%d}, off={self.half_off:#x})"
+
+    def add_hour(
+        self,
+        full_confirm: bool | None,
+        left_off: bool,
+        right_off: bool,
+        half_confirm: bool | None,
+        full_off: bool,
+    ) -> None:
+        hour = self.hours
+        self.hours += 1
+
+        if full_confirm is True:
+            self.full_confirmed |= 1 << hour
+        elif full_confirm is False:
+            self.full_unconfirmed |= 1 << hour
+        if full_off or (left_off and right_off):
+            self.full_off |= 1 << hour
+
+        for slot, off in ((hour * 2, left_off), (hour * 2 + 1, right_off)):
+            if not off:
+                continue
+            self.half_off |= 1 << slot
+            if half_confirm is True:
+                self.half_confirmed |= 1 << slot
+            elif half_confirm is False:
+                self.half_unconfirmed |= 1 << slot
+
+    def full(self, hour: int) -> State:
+        return _bit_state(
+            self.full_off, self.full_confirmed, self.full_unconfirmed, hour
+        )
+
+    def half(self, slot: int) -> State:
+        return _bit_state(
+            self.half_off, self.half_confirmed, self.half_unconfirmed, slot
+        )
+
+    def _masks(self) -> tuple[int, ...]:
+        return (
+            self.hours,
+            self.full_off,
+            self.full_confirmed,
+            self.full_unconfirmed,
+            self.half_off,
+            self.half_confirmed,
+            self.half_unconfirmed,
+        )
+
+    def to_day_schedule(self) -> DaySchedule:
+        day = DaySchedule.model_construct(
+            date=self.date,
+            has_disconnections=self.has_disconnections,
+            cells=list(_cells(self._masks())),
+        )
+        # Prefill DaySchedule.slots
+        day.__dict__["slots"] = self
+        return day
+
+    def to_json(self) -> str:
+        """Same JSON as `DaySchedule.model_dump_json()` of this day."""
+        cells = _cells_json(self._masks())
+        return (
+            f'{{"date":{_DATETIME.dump_json(self.date).decode()},'
+            f'"has_disconnections":{"true" if self.has_disconnections else "false"},'
+            f'"cells":[{cells}]}}'
+        )
+
+    def dump(self) -> list:
+        """Compact JSON-friendly form, see `load`."""
+        return [self.date.isoformat(), self.has_disconnections, *self._masks()]
+
+    @classmethod
+    def load(cls, data: list) -> "DaySlots":
+        date, has_disconnections, hours, *masks = data
+        if not 0 <= hours <= HOURS or len(masks) != 6:
+            raise ValueError(f"Malformed day slots: {data!r}")
+        return cls(
+            datetime.fromisoformat(date),
+            bool(has_disconnections),
+            int(hours),
+            *map(int, masks),
+        )
+
+    @classmethod
+    def from_day_schedule(cls, day: DaySchedule) -> "DaySlots":
+        """
+        Pack a DaySchedule. Raises ValueError if it can't be restored
+        as is (hours out of order or half-hour times not on the grid).
+        """
+        slots = cls(day.date, day.has_disconnections, len(day.cells))
+        if slots.hours > HOURS:
+            raise ValueError(f"Day has {slots.hours} hours")
+
+        for hour, cell in enumerate(day.cells):
+            if cell.hour != _SLOT_TIMES[hour * 2] or len(cell.halves) != 2:
+                raise ValueError(f"Unexpected hour cell {cell.hour}")
+            _set_state(slots, "full", hour, cell.full.off, cell.full.confirm)
+
+            for slot, half in enumerate(cell.halves, start=hour * 2):
+                expected = (_SLOT_TIMES[slot], _SLOT_TIMES[slot + 1])
+                if (half.start, half.end) != expected:
+                    raise ValueError(f"Unexpected half cell {half.start}-{half.end}")
+                _set_state(slots, "half", slot, half.off, half.confirm)
+        return slots
+
+
+def _bit_state(off: int, confirmed: int, unconfirmed: int, bit: int) -> State:
+    mask = 1 << bit
+    if confirmed & mask:
+        confirm = True
+    elif unconfirmed & mask:
+        confirm = False
+    else:
+        confirm = None
+    return bool(off & mask), confirm
+
+
+def _set_state(
+    slots: DaySlots, kind: str, bit: int, off: bool | None, confirm: bool | None
+) -> None:
+    if off is None:
+        raise ValueError("Unknown disconnection state can't be packed")
+    mask = 1 << bit
+    if off:
+        setattr(slots, f"{kind}_off", getattr(slots, f"{kind}_off") | mask)
+    if confirm is True:
+        attr = f"{kind}_confirmed"
+    elif confirm is False:
+        attr = f"{kind}_unconfirmed"
+    else:
+        return
+    setattr(slots, attr, getattr(slots, attr) | mask)
+
+
+@lru_cache(maxsize=None)
+def _hour_cell(hour: int, full: State, left: State, right: State) -> HourCell:
+    # Shared between schedules, never mutated
+    halves = [
+        HalfCell.model_construct(
+            start=_SLOT_TIMES[hour * 2],
+            end=_SLOT_TIMES[hour * 2 + 1],
+            off=left[0],
+            confirm=left[1],
+        ),
+        HalfCell.model_construct(
+            start=_SLOT_TIMES[hour * 2 + 1],
+            end=_SLOT_TIMES[hour * 2 + 2],
+            off=right[0],
+            confirm=right[1],
+        ),
+    ]
+    return HourCell.model_construct(
+        hour=_SLOT_TIMES[hour * 2],
+        full=FullCell.model_construct(off=full[0], confirm=full[1]),
+        halves=halves,
+    )
+
+
+def _hour_keys(masks: tuple[int, ...]):
+    hours, full_off, full_confirmed, full_unconfirmed, *half = masks
+    for hour in range(hours):
+        yield (
+            hour,
+            _bit_state(full_off, full_confirmed, full_unconfirmed, hour),
+            _bit_state(*half, hour * 2),
+            _bit_state(*half, hour * 2 + 1),
+        )
+
+
+# Most days repeat across houses of a queue and across checks
+@lru_cache(maxsize=4096)
+def _cells(masks: tuple[int, ...]) -> tuple[HourCell, ...]:
+    return tuple(_hour_cell(*key) for key in _hour_keys(masks))
+
+
+@lru_cache(maxsize=4096)
+def _cells_json(masks: tuple[int, ...]) -> str:
+    return ",".join(cell.model_dump_json() for cell in _cells(masks))
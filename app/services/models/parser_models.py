@@ -1,8 +1,14 @@
-from typing import List, Optional
-from datetime import datetime
+import hashlib
+from datetime import date, datetime
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, List, Optional
+
 from pydantic import BaseModel
 from logger import create_logger
 
+if TYPE_CHECKING:
+    from .day_slots import DaySlots
+
 logger = create_logger(__name__)
 
 class HalfCell(BaseModel):
@@ -28,6 +34,21 @@ class DaySchedule(BaseModel):
     has_disconnections: bool
     cells: List[HourCell]
 
+    @cached_property
+    def slots(self) -> "DaySlots":
+        """Compact form of the day, see DaySlots."""
+        from .day_slots import DaySlots
+
+        return DaySlots.from_day_schedule(self)
+
+    @cached_property
+    def digest(self) -> str:
+        """
+        Content hash of the day, SHA-256 of `model_dump_json()`
+        (computed without dumping the model).
+        """
+        return hashlib.sha256(self.slots.to_json().encode()).hexdigest()
+
 
 class CurrentDisconnection(BaseModel):
     has_disconnection: bool
@@ -45,9 +66,38 @@ class ScheduleResponse(BaseModel):
 
     disconnections: List[DaySchedule]
 
-    def get_day_schedule(self, date: datetime) -> Optional[DaySchedule]:
+    @cached_property
+    def days_by_date(self) -> dict[date, DaySchedule]:
+        days: dict[date, DaySchedule] = {}
         for day in self.disconnections:
-            logger.debug(f"Checking day schedule for date: {day.date} against {date}")
-            if day.date.date() == date.date():
-                return day
-        return None
+            days.setdefault(day.date.date(), day)
+        return days
+
+    @cached_property
+    def digest(self) -> str:
+        """
+        Content hash of the queue, current disconnection and all days.
+        Address is not included, so it is the same for every house
+        the schedule is fanned out to.
+        """
+        current = self.current_disconnection
+        parts = [
+            self.disconnection_queue,
+            current.model_dump_json() if current else "",
+            *(day.digest for day in self.disconnections),
+        ]
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def model_copy(
+        self, *, update: dict[str, Any] | None = None, deep: bool = False
+    ) -> "ScheduleResponse":
+        copied = super().model_copy(update=update, deep=deep)
+        # Memoized values are copied along with fields, drop outdated ones
+        if update:
+            copied.__dict__.pop("digest", None)
+            if "disconnections" in update:
+                copied.__dict__.pop("days_by_date", None)
+        return copied
+
+    def get_day_schedule(self, date: datetime) -> Optional[DaySchedule]:
+        return self.days_by_date.get(date.date())
@@ -0,0 +1,265 @@
+import re
+import struct
+from datetime import datetime, timedelta
+
+from .day_slots import HOURS, DaySlots
+from .parser_models import CurrentDisconnection, ScheduleResponse
+
+try:
+    import zstandard
+except ImportError:  # compression is optional
+    zstandard = None
+
+# Binary form of a cached schedule. Address is not stored, the cache key
+# already identifies it. Layout (big-endian):
+#
+#   version, flags                      header, flags: 1 = body is zstd
+#   body flags                          1 = queue packed, 2 = current outage
+#   queue                               "N.M черга" as 2 bytes, else string
+#   current outage                      state, reason, start, end
+#   day count, per day:
+#     ordinal, flags, hours             flags: 1 = has outages, 2..64 = masks
+#     masks present in flags            3 bytes per hour mask, 6 per half mask
+#
+# Strings are a 2-byte length and UTF-8, length 0xFFFF is None.
+# Reason is an index in REASONS (0 is None) or 0xFF and a string.
+# Times are minutes since 1970 plus one (0 is None) or 0xFFFFFFFF and
+# an ISO string for times with seconds or a timezone.
+VERSION = 1
+
+_HEADER = struct.Struct(">BB")
+_QUEUE = struct.Struct(">BB")
+_DAY = struct.Struct(">IBB")
+_U8 = struct.Struct(">B")
+_U16 = struct.Struct(">H")
+_U32 = struct.Struct(">I")
+
+_ZSTD = 1
+_QUEUE_PACKED = 1
+_HAS_CURRENT = 2
+_HAS_DISCONNECTIONS = 1
+_NONE = 0xFFFF
+_OTHER_REASON = 0xFF
+_OTHER_TIME = 0xFFFFFFFF
+_EPOCH = datetime(1970, 1, 1)
+_QUEUE_RE = re.compile(r"(\d{1,3})\.(\d{1,3}) черга")
+
+# Reasons VOE gives for current outages, append only
+REASONS = (
+    "Аварійне відключення",
+    "Застосування графіків погодинних відключень (ГПВ)",
+)
+_REASON_CODES = {reason: i for i, reason in enumerate(REASONS, start=1)}
+
+# Byte size of each DaySlots mask in dump() order
+_MASK_SIZES = (3, 3, 3, 6, 6, 6)
+_EMERGENCY = {None: 0, False: 1, True: 2}
+_EMERGENCY_BY_CODE = {code: value for value, code in _EMERGENCY.items()}
+
+# Smaller bodies don't get any shorter with compression
+COMPRESS_MIN_SIZE = 256
+
+_compressor = zstandard.ZstdCompressor() if zstandard else None
+_decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+
+def _pack_str(value: str | None) -> bytes:
+    if value is None:
+        return _U16.pack(_NONE)
+    raw = value.encode()
+    if len(raw) >= _NONE:
+        raise ValueError("String is too long to encode")
+    return _U16.pack(len(raw)) + raw
+
+
+def _pack_reason(reason: str | None) -> bytes:
+    if reason is None:
+        return _U8.pack(0)
+    if reason in _REASON_CODES:
+        return _U8.pack(_REASON_CODES[reason])
+    return _U8.pack(_OTHER_REASON) + _pack_str(reason)
+
+
+def _pack_datetime(value: datetime | None) -> bytes:
+    if value is None:
+        return _U32.pack(0)
+    if value.tzinfo is None and not value.second and not value.microsecond:
+        minutes = (value - _EPOCH) // timedelta(minutes=1) + 1
+        if 0 < minutes < _OTHER_TIME:
+            return _U32.pack(minutes)
+    return _U32.pack(_OTHER_TIME) + _pack_str(value.isoformat())
+
+
+def _pack_queue(queue: str) -> tuple[int, bytes]:
+    m = _QUEUE_RE.fullmatch(queue)
+    if m:
+        group, subgroup = map(int, m.groups())
+        if group < 256 and subgroup < 256 and f"{group}.{subgroup} черга" == queue:
+            return _QUEUE_PACKED, _QUEUE.pack(group, subgroup)
+    return 0, _pack_str(queue)
+
+
+def _pack_current(current: CurrentDisconnection) -> bytes:
+    state = int(current.has_disconnection) | _EMERGENCY[current.is_emergency] << 1
+    return (
+        _U8.pack(state)
+        + _pack_reason(current.reason)
+        + _pack_datetime(current.started_at)
+        + _pack_datetime(current.estimated_end)
+    )
+
+
+def _pack_day(slots: DaySlots) -> bytes:
+    date = slots.date
+    if date.tzinfo is not None or date != datetime(date.year, date.month, date.day):
+        raise ValueError(f"Day date must be a naive midnight, got {date}")
+
+    flags = _HAS_DISCONNECTIONS if slots.has_disconnections else 0
+    masks = b""
+    for i, (mask, size) in enumerate(zip(slots.dump()[3:], _MASK_SIZES)):
+        if mask:
+            flags |= 2 << i
+            try:
+                masks += mask.to_bytes(size, "big")
+            except OverflowError as e:
+                raise ValueError(f"Day has more than {HOURS} hours") from e
+    return _DAY.pack(date.toordinal(), flags, slots.hours) + masks
+
+
+def encode_schedule(schedule: ScheduleResponse, compress: bool = False) -> bytes:
+    """
+    Encode the schedule for the cache, a few dozen bytes for usual schedules.
+    Large bodies are compressed with `compress` if zstandard is installed,
+    only readers that have it too can decode them.
+    Raises ValueError for what the format can't hold (e.g. days that don't
+    start at midnight).
+    """
+    queue_flag, queue = _pack_queue(schedule.disconnection_queue)
+    body_flags = queue_flag
+    current = b""
+    if schedule.current_disconnection is not None:
+        body_flags |= _HAS_CURRENT
+        current = _pack_current(schedule.current_disconnection)
+
+    try:
+        body = b"".join(
+            [
+                _U8.pack(body_flags),
+                queue,
+                current,
+                _U8.pack(len(schedule.disconnections)),
+                *(_pack_day(day.slots) for day in schedule.disconnections),
+            ]
+        )
+    except struct.error as e:
+        raise ValueError(f"Schedule doesn't fit the format: {e}") from e
+
+    flags = 0
+    if compress and _compressor is not None and len(body) >= COMPRESS_MIN_SIZE:
+        body = _compressor.compress(body)
+        flags |= _ZSTD
+    return _HEADER.pack(VERSION, flags) + body
+
+
+class _Reader:
+    def __init__(self, data: bytes) -> None:
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def unpack(self, fmt: struct.Struct) -> tuple:
+        values = fmt.unpack_from(self.data, self.pos)
+        self.pos += fmt.size
+        return values
+
+    def take(self, size: int) -> bytes:
+        if self.pos + size > len(self.data):
+            raise ValueError("Truncated schedule")
+        chunk = bytes(self.data[self.pos : self.pos + size])
+        self.pos += size
+        return chunk
+
+    def read_str(self) -> str | None:
+        (length,) = self.unpack(_U16)
+        return None if length == _NONE else self.take(length).decode()
+
+    def read_reason(self) -> str | None:
+        (code,) = self.unpack(_U8)
+        if code == _OTHER_REASON:
+            return self.read_str()
+        return REASONS[code - 1] if code else None
+
+    def read_datetime(self) -> datetime | None:
+        (minutes,) = self.unpack(_U32)
+        if minutes == _OTHER_TIME:
+            return datetime.fromisoformat(self.read_str())
+        return _EPOCH + timedelta(minutes=minutes - 1) if minutes else None
+
+
+def _read_current(reader: _Reader) -> CurrentDisconnection:
+    (state,) = reader.unpack(_U8)
+    return CurrentDisconnection.model_construct(
+        has_disconnection=bool(state & 1),
+        is_emergency=_EMERGENCY_BY_CODE[state >> 1],
+        reason=reader.read_reason(),
+        started_at=reader.read_datetime(),
+        estimated_end=reader.read_datetime(),
+    )
+
+
+def _read_day(reader: _Reader) -> DaySlots:
+    ordinal, flags, hours = reader.unpack(_DAY)
+    if hours > HOURS:
+        raise ValueError(f"Day has {hours} hours")
+    masks = [
+        int.from_bytes(reader.take(size), "big") if flags & (2 << i) else 0
+        for i, size in enumerate(_MASK_SIZES)
+    ]
+    return DaySlots(
+        datetime.fromordinal(ordinal),
+        bool(flags & _HAS_DISCONNECTIONS),
+        hours,
+        *masks,
+    )
+
+
+def decode_schedule(data: bytes, address: str) -> ScheduleResponse:
+    """
+    Decode a schedule made by `encode_schedule`.
+    Raises ValueError for other versions and malformed data.
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("Truncated schedule")
+    version, flags = _HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f"Unsupported schedule version {version}")
+
+    body = data[_HEADER.size :]
+    if flags & _ZSTD:
+        if _decompressor is None:
+            raise ValueError("Schedule is compressed, but zstandard is not installed")
+        try:
+            body = _decompressor.decompress(body)
+        except zstandard.ZstdError as e:
+            raise ValueError(f"Malformed compressed schedule: {e}") from e
+
+    try:
+        reader = _Reader(body)
+        (body_flags,) = reader.unpack(_U8)
+        if body_flags & _QUEUE_PACKED:
+            group, subgroup = reader.unpack(_QUEUE)
+            queue = f"{group}.{subgroup} черга"
+        else:
+            queue = reader.read_str()
+        current = _read_current(reader) if body_flags & _HAS_CURRENT else None
+
+        (count,) = reader.unpack(_U8)
+        days = [_read_day(reader).to_day_schedule() for _ in range(count)]
+    except (struct.error, KeyError, IndexError, TypeError) as e:
+        raise ValueError(f"Malformed schedule: {e}") from e
+
+    return ScheduleResponse.model_construct(
+        address=address,
+        disconnection_queue=queue,
+        current_disconnection=current,
+        disconnections=days,
+    )
@@ -1,4 +1,5 @@
 import asyncio
+import time
 from datetime import datetime, timedelta
 from typing import Literal
 
@@ -14,21 +15,27 @@ from config import settings
 from exceptions import VoeDownException
 from logger import create_logger
 from services import render_schedule
-from services.fetcher import fetch_schedule
-from services.models import ScheduleResponse
-from services.parser import parse_schedule
-from storage import subscription_storage, user_storage
+from services.models import Address, ScheduleResponse
+from services.parser import NO_QUEUE_INFO
+from services.schedule_cache import (
+    ScheduleUnchanged,
+    load_changed_schedule,
+    store_queue_schedule,
+    store_schedule,
+)
+from services.utils.concurrency import Priority
+from services.utils.cpu_pool import cpu_pool
+from services.utils.fetch_wrapper import limiter_metrics, voe_breaker
+from services.utils.mode_selector import mode_selector
+from services.utils.retry import retry_budget
+from storage import queue_storage, subscription_storage, user_storage
 
 logger = create_logger(__name__)
 
 SubscriptionKinds = Literal["today", "tomorrow"]
 
-
-def _calc_hash(obj: str) -> str:
-    """Calculate a simple hash for a dictionary object."""
-    import hashlib
-
-    return hashlib.sha256(obj.encode("utf-8")).hexdigest()
+# Fingerprints of schedules loaded this tick, saved once they are diffed
+_loaded_fingerprints: dict[str, str] = {}
 
 
 async def _update_hashes_for_address(
@@ -51,7 +58,7 @@ async def _update_hashes_for_address(
     # --- TODAY ---
     today = schedule.get_day_schedule(today_date)
     if today:
-        today_hash = _calc_hash(today.model_dump_json())
+        today_hash = today.digest
 
         # If user just added subscription, do not send notification immediately
         if today_old is None:
@@ -74,7 +81,7 @@ async def _update_hashes_for_address(
     # --- TOMORROW ---
     tomorrow = schedule.get_day_schedule(tomorrow_date)
     if tomorrow:
-        tomorrow_hash = _calc_hash(tomorrow.model_dump_json())
+        tomorrow_hash = tomorrow.digest
 
         # On contrary, for tomorrow we always notify on first fetch
         if tomorrow_hash != tomorrow_old and tomorrow.has_disconnections:
@@ -92,33 +99,73 @@ async def _update_hashes_for_address(
     return changed
 
 
+async def _load_schedule(
+    addr_id: str, address_name: str, priority: Priority
+) -> ScheduleResponse | None:
+    """
+    Fetch, parse and cache schedule for the address directly from VOE.
+    Remember the address queue for queue-level polling.
+    Raise ScheduleUnchanged if VOE answered the same as at the last check.
+    """
+    last_fingerprint = None
+    if not settings.notification.silent_hash_recalculation:
+        last_fingerprint = await subscription_storage.get_fingerprint(addr_id)
+
+    try:
+        schedule, fingerprint = await load_changed_schedule(
+            addr_id, address_name, priority, last_fingerprint
+        )
+    except ScheduleUnchanged:
+        # Queue is part of the fingerprinted table, so it is the same too,
+        # only the verification is recorded to keep the rotation going
+        await queue_storage.mark_verified(addr_id, time.time())
+        raise
+    except VoeDownException:
+        logger.error(f"VOE is down, cannot fetch schedule for address {addr_id}")
+        return None
+
+    if schedule is None:
+        logger.critical("Can't get info from VOE site")
+        return None
+
+    _loaded_fingerprints[addr_id] = fingerprint
+    await _learn_queue(addr_id, schedule)
+    return schedule
+
+
+async def _learn_queue(addr_id: str, schedule: ScheduleResponse) -> None:
+    queue = schedule.disconnection_queue
+    if queue == NO_QUEUE_INFO:
+        # Can't be grouped, keep fetching this address directly
+        await queue_storage.forget(addr_id)
+        return
+
+    old = await queue_storage.set_queue(addr_id, queue, time.time())
+    if old is not None and old != queue:
+        logger.info(f"Address {addr_id} moved from queue {old} to {queue}")
+
+
 async def _process_for_address(
     bot: Bot,
     addr_id: str,
     subscribers_today: set[int],
     subscribers_tomorrow: set[int],
+    shared: ScheduleResponse | None = None,
+    priority: Priority | None = None,
 ) -> set[int]:
     """
     Process schedule for a specific address.
     Send notifications to subscribers if there are changes.
     Distinguish between 'today' and 'tomorrow' subscriptions.
+    If `shared` schedule is given (fetched for another house of the same queue),
+    use it instead of fetching the address.
+    Fetch priority defaults to the most urgent subscription of the address.
     Return a set of user IDs who were notified.
     """
 
-    city_id, street_id, house_id = map(int, addr_id.split("-"))
     processed_users = set()
     tasks = []
 
-    try:
-        raw = await fetch_schedule(city_id, street_id, house_id)
-    except VoeDownException:
-        logger.error(f"VOE is down, cannot fetch schedule for address {addr_id}")
-        return set()
-
-    if not raw:
-        logger.critical("Can't get info from VOE site")
-        return set()
-
     # Need to get full address info for message and rendering
     # TODO: refactor this adding separate method to get address info only
     address = await user_storage.get_address_by_id(
@@ -133,12 +180,40 @@ async def _process_for_address(
         logger.critical(f"Address {addr_id} not found in user storage")
         return set()
 
-    schedule = parse_schedule(raw, address.name, max_days=2)
+    if shared is None:
+        if priority is None:
+            priority = (
+                "notification_tomorrow"
+                if subscribers_tomorrow
+                else "notification_today"
+            )
+        try:
+            schedule = await _load_schedule(addr_id, address.name, priority)
+        except ScheduleUnchanged:
+            logger.debug(f"Schedule for {addr_id} is unchanged")
+            return set()
+        if schedule is None:
+            return set()
+    else:
+        schedule = shared.model_copy(update={"address": address.name})
+        # Representatives get their own schedule here
+        fingerprint = _loaded_fingerprints.get(addr_id)
+        if fingerprint is None:
+            await store_queue_schedule(addr_id, schedule, address.name)
+        else:
+            await store_schedule(addr_id, schedule, fingerprint=fingerprint)
+
     if not schedule.disconnections:
         logger.warning(f"No disconnections for {addr_id} for 2 days")
         # return set()
 
     changed = await _update_hashes_for_address(addr_id, schedule)
+    if fingerprint := _loaded_fingerprints.pop(addr_id, None):
+        await subscription_storage.set_fingerprint(addr_id, fingerprint)
+    elif shared is not None:
+        # Hashes now follow the answer for another house of the queue,
+        # an unchanged answer for this one may well be a change
+        await subscription_storage.clear_fingerprint(addr_id)
 
     today = datetime.now()
     tomorrow = datetime.now() + timedelta(days=1)
@@ -168,12 +243,14 @@ async def _process_for_address(
                 date=today,
                 address=schedule.address,
             )
-            image_schedule = render_schedule(
+            image_schedule = await cpu_pool.run(
+                render_schedule,
                 day=day_schedule,
                 is_text_enabled=False,
                 queue=schedule.disconnection_queue,
                 date=today,
                 address=schedule.address,
+                priority="notification_today",
             )
             for uid in subscribers_today:
                 if await user_storage.is_render_text_enabled(uid):
@@ -217,12 +294,14 @@ async def _process_for_address(
             date=tomorrow,
             address=schedule.address,
         )
-        image_schedule = render_schedule(
+        image_schedule = await cpu_pool.run(
+            render_schedule,
             day=day_schedule,
             is_text_enabled=False,
             queue=schedule.disconnection_queue,
             date=tomorrow,
             address=schedule.address,
+            priority="notification_tomorrow",
         )
         for uid in subscribers_tomorrow:
             if await user_storage.is_render_text_enabled(uid):
@@ -259,7 +338,12 @@ async def _process_for_address(
     return processed_users
 
 
-async def _process_address_safe(bot, addr_id: str) -> set[int]:
+async def _process_address_safe(
+    bot,
+    addr_id: str,
+    shared: ScheduleResponse | None = None,
+    priority: Priority | None = None,
+) -> set[int]:
     """Wrapper to process address and catch exceptions."""
     subs_today = await subscription_storage.get_subscribers(addr_id, "today")
     subs_tomorrow = await subscription_storage.get_subscribers(addr_id, "tomorrow")
@@ -267,7 +351,161 @@ async def _process_address_safe(bot, addr_id: str) -> set[int]:
     if not subs_today and not subs_tomorrow:
         return set()
 
-    return await _process_for_address(bot, addr_id, subs_today, subs_tomorrow)
+    return await _process_for_address(
+        bot, addr_id, subs_today, subs_tomorrow, shared=shared, priority=priority
+    )
+
+
+async def _plan_queue_polling(
+    addr_ids: set[str],
+) -> tuple[set[str], set[str], dict[str, list[str]]]:
+    """
+    Split addresses into ones that must be fetched directly
+    (unknown queue or due for re-verification) and the rest grouped by queue.
+    Also return which of the direct ones are only re-verified.
+    Queue members are sorted so that the least recently verified come first.
+    """
+    queues = await queue_storage.get_queues()
+    verified_at = await queue_storage.get_verified_at()
+
+    # Drop addresses nobody is subscribed to anymore
+    stale = [addr_id for addr_id in queues if addr_id not in addr_ids]
+    await queue_storage.forget(*stale)
+
+    direct = {addr_id for addr_id in addr_ids if addr_id not in queues}
+
+    verified_before = time.time() - settings.notification.verify_interval
+    due = sorted(
+        (
+            addr_id
+            for addr_id in addr_ids
+            if addr_id in queues and verified_at.get(addr_id, 0) <= verified_before
+        ),
+        key=lambda addr_id: verified_at.get(addr_id, 0),
+    )
+    verifying = set(due[: settings.notification.max_verifications_per_tick])
+    direct.update(verifying)
+
+    by_queue: dict[str, list[str]] = {}
+    for addr_id in sorted(addr_ids - direct, key=lambda a: verified_at.get(a, 0)):
+        by_queue.setdefault(queues[addr_id], []).append(addr_id)
+
+    return direct, verifying, by_queue
+
+
+async def _get_address(addr_id: str) -> Address | None:
+    """
+    Address info stored by any subscriber of the address.
+    """
+    for kind in ("today", "tomorrow"):
+        for uid in await subscription_storage.get_subscribers(addr_id, kind):
+            return await user_storage.get_address_by_id(uid, addr_id)
+    return None
+
+
+async def _fetch_queue_schedule(
+    queue: str, members: list[str]
+) -> tuple[ScheduleResponse | None, dict[str, ScheduleResponse]]:
+    """
+    Fetch representative houses of the queue, taking the next members
+    while the fetched ones turn out to have moved to another queue.
+    Return the schedule to fan out to the queue and the schedules fetched
+    for representatives. The schedule is None if a representative answered
+    the same as at the last check or could not be fetched (the rest of the
+    queue waits for the next tick then) or if every member was fetched.
+    """
+    step = settings.notification.representatives_per_queue
+    fetched: dict[str, ScheduleResponse] = {}
+
+    for start in range(0, len(members), step):
+        batch = members[start : start + step]
+        addresses = await asyncio.gather(*(_get_address(a) for a in batch))
+        reps = [(a, addr) for a, addr in zip(batch, addresses) if addr is not None]
+        # Representatives serve the whole queue, including tomorrow subscribers
+        results = await asyncio.gather(
+            *(
+                _load_schedule(addr_id, address.name, "notification_tomorrow")
+                for addr_id, address in reps
+            ),
+            return_exceptions=True,
+        )
+
+        queue_schedule = None
+        unchanged = failed = False
+        for (addr_id, _), res in zip(reps, results):
+            if isinstance(res, ScheduleUnchanged):
+                unchanged = True
+                continue
+            if isinstance(res, Exception):
+                logger.error(f"Error during fetching representative {addr_id}: {res}")
+            if res is None or isinstance(res, Exception):
+                failed = True
+                continue
+            fetched[addr_id] = res
+            if queue_schedule is None and res.disconnection_queue == queue:
+                # Current outage info is address-specific, don't fan it out
+                queue_schedule = res.model_copy(update={"current_disconnection": None})
+
+        if queue_schedule is not None or unchanged:
+            return queue_schedule, fetched
+        if failed:
+            # Fetching every member directly would only add to VOE load
+            logger.warning(f"Failed to fetch queue {queue}, skipping it this tick")
+            return None, fetched
+
+    return None, fetched
+
+
+async def _process_tick(bot: Bot, addr_ids: set[str]) -> list[set[int] | BaseException]:
+    """
+    Process all subscribed addresses.
+    With queue polling only a few houses per queue are fetched,
+    the rest get the schedule of their queue.
+    """
+    if voe_breaker.state == "open":
+        logger.warning("VOE is down, skipping notification tick")
+        return []
+
+    _loaded_fingerprints.clear()
+
+    if not settings.notification.queue_polling:
+        tasks = [_process_address_safe(bot, addr_id=addr_id) for addr_id in addr_ids]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    direct, verifying, by_queue = await _plan_queue_polling(addr_ids)
+
+    queue_results = await asyncio.gather(
+        *(_fetch_queue_schedule(queue, members) for queue, members in by_queue.items())
+    )
+
+    shared: dict[str, ScheduleResponse] = {}
+    for members, (queue_schedule, fetched) in zip(by_queue.values(), queue_results):
+        shared.update(fetched)
+        if queue_schedule is None:
+            continue
+        for addr_id in members:
+            if addr_id not in fetched:
+                shared[addr_id] = queue_schedule
+
+    logger.info(
+        f"Queue polling: {len(by_queue)} queues, "
+        f"{len(direct) + sum(len(f) for _, f in queue_results)} direct fetches "
+        f"for {len(addr_ids)} addresses"
+    )
+
+    tasks = [
+        _process_address_safe(
+            bot,
+            addr_id=addr_id,
+            priority="background" if addr_id in verifying else None,
+        )
+        for addr_id in direct
+    ]
+    tasks.extend(
+        _process_address_safe(bot, addr_id=addr_id, shared=schedule)
+        for addr_id, schedule in shared.items()
+    )
+    return await asyncio.gather(*tasks, return_exceptions=True)
 
 
 async def notification_worker(bot: Bot, interval_seconds: int = 900) -> None:
@@ -276,10 +514,7 @@ async def notification_worker(bot: Bot, interval_seconds: int = 900) -> None:
             addr_ids = await subscription_storage.get_all_addresses()
 
             # List of sets of processed users
-            tasks = [
-                _process_address_safe(bot, addr_id=addr_id) for addr_id in addr_ids
-            ]
-            result_list_raw = await asyncio.gather(*tasks, return_exceptions=True)
+            result_list_raw = await _process_tick(bot, addr_ids)
             exceptions = [res for res in result_list_raw if isinstance(res, Exception)]
             for e in exceptions:
                 logger.error("Error during processing address: %s", e)
@@ -305,6 +540,11 @@ async def notification_worker(bot: Bot, interval_seconds: int = 900) -> None:
             logger.info(
                 f"Notification worker tick completed. Processed {len(processed_users)} users."
             )
+            logger.info(f"Upstream concurrency: {limiter_metrics()}")
+            logger.info(f"Upstream retries: {retry_budget.metrics}")
+            logger.info(f"CPU pool: {cpu_pool.metrics}")
+            if settings.flare.operating_mode == "hybrid":
+                logger.info(f"Upstream modes: {mode_selector.metrics}")
 
             if settings.notification.silent_hash_recalculation:
                 logger.info(
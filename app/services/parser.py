@@ -1,6 +1,7 @@
 from logger import create_logger
 from lxml import etree
 
+from .fast_parser import NO_QUEUE_INFO, parse_schedule_fast
 from .models import (
     CurrentDisconnection,
     DaySchedule,
@@ -25,6 +26,20 @@ logger = create_logger(__name__)
 
 
 def parse_schedule(html: str, address_name: str, max_days: int = 2) -> ScheduleResponse:
+    """
+    Parse schedule with the single-pass parser,
+    falling back to the XPath parser if the markup has changed.
+    """
+    try:
+        return parse_schedule_fast(html, address_name)
+    except Exception as e:
+        logger.warning(f"Fast parser failed for {address_name}, falling back: {e}")
+        return parse_schedule_xpath(html, address_name, max_days)
+
+
+def parse_schedule_xpath(
+    html: str, address_name: str, max_days: int = 2
+) -> ScheduleResponse:
     logger.debug("Starting parsing")
 
     tree = etree.HTML(html)
@@ -41,7 +56,7 @@ def parse_schedule(html: str, address_name: str, max_days: int = 2) -> ScheduleR
     if not queue_nodes:
         return ScheduleResponse(
             address=address_name,
-            disconnection_queue="Немає інформації про чергу відключень",
+            disconnection_queue=NO_QUEUE_INFO,
             disconnections=[],
             current_disconnection=None,
         )
@@ -0,0 +1,227 @@
+import asyncio
+import hashlib
+import time
+from datetime import date
+
+from config import settings
+from exceptions import VoeDownException
+from logger import create_logger
+from redis.exceptions import RedisError
+from storage import schedule_storage
+
+from .fetcher import fetch_schedule
+from .models import ScheduleResponse
+from .models.schedule_codec import decode_schedule, encode_schedule
+from .parser import parse_schedule
+from .utils.concurrency import Priority
+from .utils.cpu_pool import cpu_pool
+
+logger = create_logger(__name__)
+
+# Keep references to background refreshes so they are not garbage collected
+_refreshing: dict[str, asyncio.Task] = {}
+
+
+class ScheduleUnchanged(Exception):
+    """VOE answered with the same schedule as last time."""
+
+
+def schedule_fingerprint(raw: str) -> str:
+    """
+    Cheap digest of the schedule table in a raw VOE answer.
+    The rest of the form carries per-request tokens, so only the table
+    is hashed. Today's date is mixed in because the same table means
+    different "today" and "tomorrow" after midnight.
+    """
+    start = raw.find('<div class="table_wrapper">')
+    end = raw.find("<input", start)
+    if start == -1:
+        start, end = 0, len(raw)
+    elif end == -1:
+        end = len(raw)
+
+    digest = hashlib.blake2b(date.today().isoformat().encode(), digest_size=16)
+    digest.update(raw[start:end].encode())
+    return digest.hexdigest()
+
+
+class CachedSchedule:
+    def __init__(
+        self, schedule: ScheduleResponse, fetched_at: float, shared: bool
+    ) -> None:
+        self.schedule = schedule
+        self.fetched_at = fetched_at
+        # Fetched for another house of the same queue
+        self.shared = shared
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    @property
+    def is_stale(self) -> bool:
+        return self.shared or self.age >= settings.schedule_cache.fresh_ttl
+
+    @property
+    def age_label(self) -> str:
+        minutes = int(self.age // 60)
+        if minutes < 1:
+            return "оновлено щойно"
+        if minutes < 60:
+            return f"оновлено {minutes} хв тому"
+        return f"оновлено {minutes // 60} год тому"
+
+
+async def get_cached_schedule(
+    addr_id: str, address_name: str
+) -> CachedSchedule | None:
+    try:
+        data = await schedule_storage.get(addr_id)
+    except RedisError as e:
+        logger.warning(f"Failed to read cached schedule {addr_id}: {e}")
+        return None
+    if not data:
+        return None
+
+    try:
+        schedule = decode_schedule(data["data"], address_name)
+    except (ValueError, KeyError) as e:
+        logger.warning(f"Dropping malformed cached schedule {addr_id}: {e}")
+        return None
+    return CachedSchedule(schedule, float(data["fetched_at"]), data["shared"] == b"1")
+
+
+async def store_schedule(
+    addr_id: str,
+    schedule: ScheduleResponse,
+    shared: bool = False,
+    fingerprint: str | None = None,
+    fetched_at: float | None = None,
+) -> None:
+    try:
+        data = encode_schedule(schedule, settings.schedule_cache.compress)
+    except ValueError as e:
+        logger.warning(f"Can't cache schedule {addr_id}: {e}")
+        return
+
+    try:
+        await schedule_storage.set(
+            addr_id,
+            data,
+            fetched_at or time.time(),
+            shared,
+            settings.schedule_cache.retention,
+            fingerprint,
+        )
+    except RedisError as e:
+        logger.warning(f"Failed to cache schedule {addr_id}: {e}")
+
+
+async def store_queue_schedule(
+    addr_id: str, schedule: ScheduleResponse, address_name: str
+) -> None:
+    """
+    Cache the schedule fetched for another house of the address queue.
+    A fresh schedule of the address itself keeps its current outage info,
+    so that it is still served without going to VOE.
+    """
+    cached = await get_cached_schedule(addr_id, address_name)
+    if cached is None or cached.is_stale:
+        await store_schedule(addr_id, schedule, shared=True)
+        return
+
+    current = cached.schedule.current_disconnection
+    schedule = schedule.model_copy(update={"current_disconnection": current})
+    # Age is that of the current outage info, the oldest part
+    await store_schedule(addr_id, schedule, fetched_at=cached.fetched_at)
+
+
+async def load_changed_schedule(
+    addr_id: str,
+    address_name: str,
+    priority: Priority = "interactive",
+    last_fingerprint: str | None = None,
+) -> tuple[ScheduleResponse | None, str | None]:
+    """
+    Fetch and parse schedule for the address from VOE and cache it.
+    Return the schedule (None if VOE gave no schedule) and its fingerprint.
+    Raise ScheduleUnchanged without parsing if the fingerprint is
+    `last_fingerprint`, VoeDownException if VOE is down.
+    """
+    city_id, street_id, house_id = map(int, addr_id.split("-"))
+
+    raw = await fetch_schedule(city_id, street_id, house_id, priority)
+    if not raw:
+        return None, None
+
+    fingerprint = schedule_fingerprint(raw)
+    if fingerprint == last_fingerprint:
+        try:
+            await schedule_storage.touch(
+                addr_id, fingerprint, time.time(), settings.schedule_cache.retention
+            )
+        except RedisError as e:
+            logger.warning(f"Failed to refresh cached schedule {addr_id}: {e}")
+        raise ScheduleUnchanged(addr_id)
+
+    schedule = await cpu_pool.run(
+        parse_schedule, raw, address_name, max_days=2, priority=priority
+    )
+    await store_schedule(addr_id, schedule, fingerprint=fingerprint)
+    return schedule, fingerprint
+
+
+async def load_schedule(
+    addr_id: str, address_name: str, priority: Priority = "interactive"
+) -> ScheduleResponse | None:
+    """
+    Fetch and parse schedule for the address from VOE and cache it.
+    Return None if VOE gave no schedule, raise VoeDownException if it is down.
+    """
+    schedule, _ = await load_changed_schedule(addr_id, address_name, priority)
+    return schedule
+
+
+async def _refresh(addr_id: str, address_name: str) -> None:
+    try:
+        # Someone is served the cached copy meanwhile, users waiting go first
+        await load_schedule(addr_id, address_name, "background")
+    except VoeDownException:
+        logger.warning(f"VOE is down, keeping cached schedule for {addr_id}")
+    except Exception as e:
+        logger.exception("Failed to refresh schedule %s: %s", addr_id, e)
+
+
+def _refresh_in_background(addr_id: str, address_name: str) -> None:
+    if addr_id in _refreshing:
+        return
+    task = asyncio.create_task(_refresh(addr_id, address_name))
+    _refreshing[addr_id] = task
+    task.add_done_callback(lambda _: _refreshing.pop(addr_id, None))
+
+
+async def get_schedule(addr_id: str, address_name: str) -> CachedSchedule | None:
+    """
+    Schedule for bot handlers (stale-while-revalidate).
+
+    Cached schedule is returned right away, a stale one is refreshed in
+    background. VOE is requested directly if nothing is cached or only the
+    schedule of the address queue is, as it has no current outage info.
+    Raises VoeDownException if VOE is down and there is no cached copy.
+    """
+    cached = await get_cached_schedule(addr_id, address_name)
+    if cached is not None and not cached.shared:
+        if cached.is_stale:
+            _refresh_in_background(addr_id, address_name)
+        return cached
+
+    try:
+        schedule = await load_schedule(addr_id, address_name)
+    except VoeDownException:
+        if cached is None:
+            raise
+        logger.warning(f"VOE is down, serving queue schedule for {addr_id}")
+        return cached
+    if schedule is None:
+        return cached
+    return CachedSchedule(schedule, time.time(), shared=False)
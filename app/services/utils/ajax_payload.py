@@ -0,0 +1,37 @@
+import html
+import json
+import re
+
+# Browser shows Drupal form submissions (iframe transport) inside <textarea>
+# and plain JSON responses inside <pre>, with the JSON text HTML-escaped
+_PAYLOAD_TAGS = [
+    (re.compile(rf"<{tag}\b[^>]*>", re.I), re.compile(rf"</{tag}\s*>", re.I))
+    for tag in ("textarea", "pre")
+]
+
+
+def extract_ajax_payload(page: str):
+    """
+    Find the AJAX JSON in a browser-rendered page and decode it.
+    Scans the page once per tag instead of building a DOM tree.
+    """
+    for open_tag, close_tag in _PAYLOAD_TAGS:
+        start = open_tag.search(page)
+        if not start:
+            continue
+        end = close_tag.search(page, start.end())
+        if not end:
+            continue
+        return json.loads(html.unescape(page[start.end() : end.start()]))
+
+    raise ValueError("No JSON payload found in AJAX drupal response")
+
+
+def insert_html(commands: list[dict]) -> str:
+    """
+    HTML fragment of the Drupal `insert` command with the schedule.
+    """
+    for command in commands:
+        if command.get("command") == "insert":
+            return command["data"]
+    raise ValueError("No insert command in AJAX drupal response")
@@ -0,0 +1,112 @@
+import json
+import time
+from collections import OrderedDict
+
+from config import settings
+from logger import create_logger
+from redis.exceptions import RedisError
+
+logger = create_logger(__name__)
+
+CacheKey = tuple[str, int | None, str]
+
+
+def normalize_query(query: str | None) -> str:
+    """
+    Collapse whitespace so that "  Соборна " and "Соборна" share a cache entry.
+    """
+    return " ".join((query or "").split())
+
+
+class AutocompleteCache:
+    """
+    Two-tier cache for autocomplete answers: in-process LRU in front of Redis.
+    Empty answers (including 404) are cached with a shorter TTL.
+    """
+
+    def __init__(self) -> None:
+        self._local: OrderedDict[CacheKey, tuple[float, list]] = OrderedDict()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "size": len(self._local),
+        }
+
+    @staticmethod
+    def _key(kind: str, parent_id: int | None, query: str | None) -> CacheKey:
+        return kind, parent_id, normalize_query(query).casefold()
+
+    @staticmethod
+    def _ttl(value: list) -> int:
+        cfg = settings.autocomplete_cache
+        return cfg.ttl if value else cfg.negative_ttl
+
+    def _get_local(self, key: CacheKey) -> list | None:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return value
+
+    def _set_local(self, key: CacheKey, value: list, ttl: int) -> None:
+        self._local[key] = (time.monotonic() + ttl, value)
+        self._local.move_to_end(key)
+        while len(self._local) > settings.autocomplete_cache.lru_size:
+            self._local.popitem(last=False)
+
+    async def get(
+        self, kind: str, parent_id: int | None, query: str | None
+    ) -> list | None:
+        if not settings.autocomplete_cache.enabled:
+            return None
+
+        # storage imports services.models, so import it lazily to avoid a cycle
+        from storage import autocomplete_storage
+
+        key = self._key(kind, parent_id, query)
+        value = self._get_local(key)
+        if value is not None:
+            self.local_hits += 1
+            return value
+
+        try:
+            raw = await autocomplete_storage.get(*key)
+        except RedisError as e:
+            logger.warning(f"Failed to read autocomplete cache: {e}")
+            raw = None
+
+        if raw is None:
+            self.misses += 1
+            return None
+
+        self.redis_hits += 1
+        value = json.loads(raw)
+        self._set_local(key, value, self._ttl(value))
+        return value
+
+    async def set(
+        self, kind: str, parent_id: int | None, query: str | None, value: list
+    ) -> None:
+        if not settings.autocomplete_cache.enabled:
+            return
+
+        from storage import autocomplete_storage
+
+        key = self._key(kind, parent_id, query)
+        ttl = self._ttl(value)
+        self._set_local(key, value, ttl)
+        try:
+            await autocomplete_storage.set(*key, json.dumps(value), ttl)
+        except RedisError as e:
+            logger.warning(f"Failed to write autocomplete cache: {e}")
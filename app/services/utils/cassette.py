@@ -0,0 +1,166 @@
+import asyncio
+import hashlib
+import json
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+import httpx
+from config import settings
+from exceptions import CassetteMissException
+from logger import create_logger
+
+logger = create_logger(__name__)
+
+# Frame: total length, key length, key, zlib-compressed JSON record
+_FRAME_HEADER = struct.Struct(">IH")
+
+
+def request_key(
+    method: str, url: str, params: dict | None, data: dict | None
+) -> str:
+    raw = json.dumps(
+        [method.upper(), url, params or {}, data or {}],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class Cassette:
+    """
+    Append-only archive of upstream responses.
+
+    Every record is compressed on its own and stored with its request key
+    in a plain frame, so the index (key -> file offsets) is rebuilt by
+    skipping over the compressed bodies. Several responses for one key are
+    replayed in the order they were recorded, starting over at the end.
+    File I/O runs in a thread, appends one at a time.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self._index: dict[str, list[int]] = {}
+        self._cursor: dict[str, int] = {}
+        self._file = None
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    async def _ensure_loaded(self) -> None:
+        async with self._lock:
+            if not self._loaded:
+                await asyncio.to_thread(self._load_index)
+                self._loaded = True
+
+    async def _store(self, key: str, record: dict) -> None:
+        async with self._lock:
+            await asyncio.to_thread(self._append, key, record)
+
+    def _load_index(self) -> None:
+        if not self.path.exists():
+            return
+
+        with self.path.open("rb") as f:
+            while header := f.read(_FRAME_HEADER.size):
+                if len(header) < _FRAME_HEADER.size:
+                    break
+                offset = f.tell() - _FRAME_HEADER.size
+                length, key_length = _FRAME_HEADER.unpack(header)
+                key = f.read(key_length).decode()
+                f.seek(length - key_length, 1)
+                self._index.setdefault(key, []).append(offset)
+
+        logger.info(
+            f"Loaded cassette {self.path}: {len(self._index)} requests, "
+            f"{sum(map(len, self._index.values()))} responses"
+        )
+
+    def _read(self, offset: int) -> dict:
+        with self.path.open("rb") as f:
+            f.seek(offset)
+            length, key_length = _FRAME_HEADER.unpack(f.read(_FRAME_HEADER.size))
+            body = f.read(length)[key_length:]
+        return json.loads(zlib.decompress(body))
+
+    def _append(self, key: str, record: dict) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("ab")
+
+        key_bytes = key.encode()
+        body = zlib.compress(json.dumps(record, ensure_ascii=False).encode())
+        offset = self._file.tell()
+        self._file.write(
+            _FRAME_HEADER.pack(len(key_bytes) + len(body), len(key_bytes))
+            + key_bytes
+            + body
+        )
+        self._file.flush()
+        self._index.setdefault(key, []).append(offset)
+
+    async def record(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Call upstream and store its result (or HTTP error status) under `key`.
+        """
+        await self._ensure_loaded()
+        start = time.monotonic()
+        try:
+            result = await fn()
+        except httpx.HTTPStatusError as e:
+            await self._store(
+                key,
+                {
+                    "latency": time.monotonic() - start,
+                    "status": e.response.status_code,
+                },
+            )
+            raise
+
+        await self._store(
+            key, {"latency": time.monotonic() - start, "result": result}
+        )
+        return result
+
+    async def replay(self, key: str, url: str) -> Any:
+        """
+        Return the recorded result for `key` after its recorded latency
+        multiplied by `cassette.latency_scale`.
+        """
+        await self._ensure_loaded()
+        offsets = self._index.get(key)
+        if not offsets:
+            raise CassetteMissException(f"No recorded response for {url}")
+
+        cursor = self._cursor.get(key, 0)
+        self._cursor[key] = (cursor + 1) % len(offsets)
+        record = await asyncio.to_thread(self._read, offsets[cursor])
+
+        delay = record["latency"] * settings.cassette.latency_scale
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if "status" in record:
+            request = httpx.Request("GET", url)
+            raise httpx.HTTPStatusError(
+                f"Recorded VOE answer {record['status']}",
+                request=request,
+                response=httpx.Response(record["status"], request=request),
+            )
+        return record["result"]
+
+
+_cassette: Cassette | None = None
+
+
+def get_cassette() -> Cassette | None:
+    """Cassette for the configured mode, None if recording is off."""
+    global _cassette
+
+    if settings.cassette.mode == "off":
+        return None
+    if _cassette is None:
+        _cassette = Cassette(settings.cassette.file)
+    return _cassette
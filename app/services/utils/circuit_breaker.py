@@ -0,0 +1,148 @@
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Literal
+
+from config import settings
+from exceptions import CircuitOpenException
+from logger import create_logger
+from redis.exceptions import RedisError
+
+logger = create_logger(__name__)
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+class CircuitBreaker:
+    """
+    Fail fast while upstream is down.
+
+    Opens when the failure rate over the recent calls exceeds the threshold.
+    After `open_timeout` a single probe request is let through (half-open):
+    success closes the circuit, failure opens it again.
+    The open state is published to Redis so other replicas fail fast too.
+    """
+
+    def __init__(self, name: str, is_failure: Callable[[Exception], bool]) -> None:
+        self.name = name
+        self.is_failure = is_failure
+
+        self._state: CircuitState = "closed"
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._outcomes: deque[bool] = deque(maxlen=settings.circuit_breaker.window)
+
+    @property
+    def state(self) -> CircuitState:
+        cfg = settings.circuit_breaker
+        if (
+            self._state == "open"
+            and time.monotonic() - self._opened_at >= cfg.open_timeout
+        ):
+            self._state = "half_open"
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """
+        True if requests are being rejected right now
+        (a half-open circuit is still considered down until the probe succeeds).
+        """
+        return self.state != "closed"
+
+    async def _publish(self, is_open: bool) -> None:
+        # storage imports services.models, so import it lazily to avoid a cycle
+        from storage import circuit_storage
+
+        try:
+            if is_open:
+                await circuit_storage.set_open(
+                    self.name, settings.circuit_breaker.open_timeout
+                )
+            else:
+                await circuit_storage.clear(self.name)
+        except RedisError as e:
+            logger.warning(f"Failed to publish circuit {self.name} state: {e}")
+
+    async def _opened_elsewhere(self) -> bool:
+        from storage import circuit_storage
+
+        try:
+            return await circuit_storage.is_open(self.name)
+        except RedisError:
+            return False
+
+    async def _before_call(self) -> bool:
+        """
+        Raise if the call is not allowed. Return True if the call is a probe.
+        """
+        state = self.state
+        if state == "open":
+            raise CircuitOpenException(f"Circuit {self.name} is open")
+
+        if state == "half_open":
+            if self._probe_in_flight:
+                raise CircuitOpenException(f"Circuit {self.name} is probing")
+            self._probe_in_flight = True
+            logger.info(f"Circuit {self.name} is half-open, sending probe request")
+            return True
+
+        if await self._opened_elsewhere():
+            raise CircuitOpenException(
+                f"Circuit {self.name} is open on another replica"
+            )
+        return False
+
+    async def _open(self) -> None:
+        self._state = "open"
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        logger.error(f"Circuit {self.name} opened, failing fast")
+        await self._publish(True)
+
+    async def _record(self, ok: bool, probe: bool) -> None:
+        cfg = settings.circuit_breaker
+
+        if probe:
+            self._probe_in_flight = False
+            if ok:
+                self._state = "closed"
+                self._outcomes.clear()
+                logger.info(f"Circuit {self.name} closed, upstream is back")
+                await self._publish(False)
+            else:
+                await self._open()
+            return
+
+        self._outcomes.append(ok)
+        failures = self._outcomes.count(False)
+        if (
+            self._state == "closed"
+            and len(self._outcomes) >= cfg.min_calls
+            and failures / len(self._outcomes) >= cfg.failure_rate
+        ):
+            await self._open()
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """
+        Wrap one upstream call. Raises CircuitOpenException without
+        calling upstream while the circuit is open.
+        """
+        if not settings.circuit_breaker.enabled:
+            yield
+            return
+
+        probe = await self._before_call()
+        try:
+            yield
+        except Exception as e:
+            await self._record(not self.is_failure(e), probe)
+            raise
+        except BaseException:
+            # Cancelled, let the next call probe
+            if probe:
+                self._probe_in_flight = False
+            raise
+        else:
+            await self._record(True, probe)
@@ -0,0 +1,204 @@
+import asyncio
+import time
+from uuid import uuid4
+
+from config import settings
+from logger import create_logger
+from redis.exceptions import RedisError
+
+from .flare_solver import solve_challenge
+
+logger = create_logger(__name__)
+
+CLEARANCE_NAME = "voe"
+
+
+class Clearance:
+    """
+    cf_clearance cookie together with the user agent it was issued for.
+    """
+
+    def __init__(
+        self, cookie: str | None, user_agent: str | None, expires_at: float
+    ) -> None:
+        self.cookie = cookie
+        self.user_agent = user_agent
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_settings(cls) -> "Clearance":
+        """Clearance from environment, used until one is solved."""
+        return cls(settings.fetcher.cookie, None, 0)
+
+    @property
+    def cookies(self) -> dict[str, str] | None:
+        return {"cf_clearance": self.cookie} if self.cookie else None
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = settings.fetcher.headers
+        if self.user_agent:
+            headers = {**headers, "User-Agent": self.user_agent}
+        return headers
+
+    @property
+    def expires_in(self) -> float:
+        return self.expires_at - time.time()
+
+
+class ClearanceManager:
+    """
+    Keeps cf_clearance in Redis so that every replica uses the same cookie
+    and only one of them solves the challenge at a time.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._current = Clearance.from_settings()
+        self._loaded_at: float | None = None
+        self._renewing: asyncio.Task | None = None
+
+    async def _reload(self) -> Clearance:
+        # storage imports services.models, so import it lazily to avoid a cycle
+        from storage import clearance_storage
+
+        try:
+            data = await clearance_storage.get(self.name)
+        except RedisError as e:
+            logger.warning(f"Failed to load clearance {self.name}: {e}")
+            return self._current
+
+        self._loaded_at = time.monotonic()
+        if data:
+            self._current = Clearance(
+                data["cookie"], data.get("user_agent"), float(data["expires_at"])
+            )
+        return self._current
+
+    async def get(self) -> Clearance:
+        if (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at >= settings.clearance.reload_interval
+        ):
+            return await self._reload()
+        return self._current
+
+    async def renew(self, stale: Clearance | None = None) -> Clearance:
+        """
+        Get a new clearance instead of `stale`. Callers in this process share
+        one renewal, other replicas wait for the one holding the lock.
+        """
+        if self._renewing is None:
+            self._renewing = asyncio.create_task(self._renew(stale))
+            self._renewing.add_done_callback(self._forget)
+        return await asyncio.shield(self._renewing)
+
+    def _forget(self, task: asyncio.Task) -> None:
+        self._renewing = None
+        if not task.cancelled():
+            task.exception()
+
+    async def _renew(self, stale: Clearance | None) -> Clearance:
+        from storage import flight_storage
+
+        current = await self._reload()
+        if stale is not None and current.cookie != stale.cookie:
+            # Already renewed by another replica
+            return current
+
+        cfg = settings.clearance
+        lock_key = f"clearance:{self.name}"
+        token = uuid4().hex
+        try:
+            owner = await flight_storage.acquire(lock_key, token, cfg.solve_timeout)
+        except RedisError as e:
+            logger.warning(f"Redis is unavailable, solving {self.name} locally: {e}")
+            return await self._solve()
+
+        if not owner:
+            return await self._wait_for_other(current, lock_key)
+
+        try:
+            return await self._solve()
+        finally:
+            try:
+                await flight_storage.release(lock_key, token)
+            except RedisError as e:
+                logger.warning(f"Failed to release clearance lock {self.name}: {e}")
+
+    async def _wait_for_other(self, current: Clearance, lock_key: str) -> Clearance:
+        from storage import flight_storage
+
+        logger.info(f"Waiting for another replica to solve {self.name} challenge")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.clearance.solve_timeout
+        while loop.time() < deadline:
+            await asyncio.sleep(1)
+            fresh = await self._reload()
+            if fresh.cookie != current.cookie:
+                return fresh
+            try:
+                if not await flight_storage.is_locked(lock_key):
+                    break
+            except RedisError:
+                break
+
+        # The other replica failed, solve it ourselves
+        return await self._solve()
+
+    async def _solve(self) -> Clearance:
+        from storage import clearance_storage
+
+        logger.info("🔥 Solving Cloudflare challenge with FlareSolverr…")
+        cfg = settings.clearance
+        solution = await solve_challenge(settings.fetcher.base_url)
+
+        expires_at = time.time() + cfg.max_age
+        cookie = None
+        for c in solution["cookies"]:
+            if c["name"] == "cf_clearance":
+                cookie = c["value"]
+                if c.get("expires", -1) > 0:
+                    expires_at = min(expires_at, c["expires"])
+
+        if cookie is None:
+            raise RuntimeError("FlareSolverr returned no cf_clearance cookie")
+
+        self._current = Clearance(cookie, solution["user_agent"], expires_at)
+        self._loaded_at = time.monotonic()
+        try:
+            await clearance_storage.set(
+                self.name, cookie, solution["user_agent"], expires_at
+            )
+        except RedisError as e:
+            logger.warning(f"Failed to store clearance {self.name}: {e}")
+
+        logger.info(
+            f"Got cf_clearance, expires in {self._current.expires_in / 60:.0f} min"
+        )
+        return self._current
+
+    async def refresh_if_expiring(self) -> None:
+        current = await self._reload()
+        if current.cookie and current.expires_in > settings.clearance.refresh_before:
+            return
+        await self.renew(current)
+
+
+clearance_manager = ClearanceManager(CLEARANCE_NAME)
+
+
+async def clearance_worker(interval_seconds: int) -> None:
+    """
+    Re-solve the challenge in background shortly before cf_clearance
+    expires, so that fetches keep using a valid cookie.
+    """
+    while True:
+        try:
+            await clearance_manager.refresh_if_expiring()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("Clearance refresh failed %s", e)
+
+        await asyncio.sleep(interval_seconds)
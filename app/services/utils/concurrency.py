@@ -0,0 +1,190 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Literal, get_args
+
+from config import settings
+from logger import create_logger
+
+logger = create_logger(__name__)
+
+# From the most to the least urgent
+Priority = Literal[
+    "interactive", "notification_tomorrow", "notification_today", "background"
+]
+PRIORITIES: tuple[Priority, ...] = get_args(Priority)
+
+
+class Sample:
+    """Outcome of one upstream request, filled in by the caller."""
+
+    def __init__(self) -> None:
+        self.failed = False
+        # Request was not sent, so it says nothing about upstream
+        self.skipped = False
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter for upstream requests.
+
+    The limit grows by one per `limit` successful requests while latency and
+    error rate over the recent window stay under targets, and is cut
+    multiplicatively as soon as either of them is exceeded.
+
+    Requests waiting for a slot are queued per priority. Freed slots are
+    handed out by smooth weighted round robin over non-empty queues, so
+    urgent requests overtake the background ones, which still keep a
+    share proportional to their weight and never starve.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        latency_target: float,
+    ) -> None:
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+
+        self.in_flight = 0
+        self.waiting = 0
+
+        self._queues: dict[Priority, deque[asyncio.Future]] = {
+            p: deque() for p in PRIORITIES
+        }
+        self._credits: dict[Priority, int] = {p: 0 for p in PRIORITIES}
+        self._samples: deque[tuple[float, bool]] = deque(
+            maxlen=settings.concurrency.window
+        )
+        self._last_decrease = 0.0
+
+    @property
+    def metrics(self) -> dict[str, float]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+        }
+
+    async def _acquire(self, priority: Priority) -> None:
+        if self.in_flight < int(self.limit) and not self.waiting:
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[priority].append(waiter)
+        self.waiting += 1
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over right before cancellation, pass it on
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._queues[priority].remove(waiter)
+                self.waiting -= 1
+            raise
+
+    def _next_priority(self) -> Priority | None:
+        weights = settings.concurrency.priority
+        ready = [p for p in PRIORITIES if self._queues[p]]
+        if not ready:
+            return None
+
+        total = 0
+        for p in PRIORITIES:
+            if p in ready:
+                self._credits[p] += getattr(weights, p)
+                total += getattr(weights, p)
+            else:
+                # Idle queues don't save up credit
+                self._credits[p] = 0
+
+        chosen = max(ready, key=lambda p: self._credits[p])
+        self._credits[chosen] -= total
+        return chosen
+
+    def _wake(self) -> None:
+        while self.in_flight < int(self.limit):
+            priority = self._next_priority()
+            if priority is None:
+                return
+            waiter = self._queues[priority].popleft()
+            self.waiting -= 1
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def _release(self, latency: float | None, failed: bool) -> None:
+        self.in_flight -= 1
+        if latency is not None:
+            self._update_limit(latency, failed)
+        self._wake()
+
+    def _update_limit(self, latency: float, failed: bool) -> None:
+        cfg = settings.concurrency
+        self._samples.append((latency, failed))
+
+        errors = sum(1 for _, f in self._samples if f)
+        avg_latency = sum(lat for lat, _ in self._samples) / len(self._samples)
+        enough = len(self._samples) >= cfg.min_samples
+
+        congested = failed or (
+            enough
+            and (
+                errors / len(self._samples) > cfg.error_rate_target
+                or avg_latency > self.latency_target
+            )
+        )
+
+        now = time.monotonic()
+        if congested:
+            # Decrease at most once per cooldown, requests started before
+            # the last decrease are still reporting the old congestion
+            if now - self._last_decrease < cfg.cooldown:
+                return
+            old = int(self.limit)
+            self.limit = max(self.min_limit, self.limit * cfg.decrease_factor)
+            self._last_decrease = now
+            self._samples.clear()
+            if int(self.limit) != old:
+                logger.warning(
+                    f"Upstream {self.name} is congested "
+                    f"(latency {avg_latency:.1f}s, {errors} errors), "
+                    f"limit {old} -> {int(self.limit)}"
+                )
+        elif latency <= self.latency_target:
+            old = int(self.limit)
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            if int(self.limit) != old:
+                logger.info(f"Upstream {self.name} limit {old} -> {int(self.limit)}")
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = "interactive") -> AsyncIterator[Sample]:
+        """
+        Hold one concurrency slot for a single upstream request.
+        Any exception raised inside counts as a failure.
+        """
+        await self._acquire(priority)
+        sample = Sample()
+        start = time.monotonic()
+        # Cancelled requests say nothing about upstream health
+        latency = None
+        try:
+            yield sample
+            latency = time.monotonic() - start
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            sample.failed = True
+            latency = time.monotonic() - start
+            raise
+        finally:
+            self._release(None if sample.skipped else latency, sample.failed)
@@ -0,0 +1,116 @@
+import asyncio
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from typing import Callable, TypeVar
+
+from config import settings
+from logger import create_logger
+
+from .concurrency import Priority
+
+logger = create_logger(__name__)
+
+T = TypeVar("T")
+
+
+class CpuPool:
+    """
+    Executor for CPU-bound work (schedule parsing, image rendering),
+    so that the event loop keeps handling updates in the meantime.
+
+    At most `workers + max_queue` jobs are handed to the executor at once,
+    further callers wait here. Non-interactive jobs never occupy more than
+    `workers - interactive_reserve` workers, so bot handlers don't queue
+    up behind all renders of a notification tick.
+    """
+
+    def __init__(self) -> None:
+        cfg = settings.cpu_pool
+        self._executor: Executor | None = None
+        self._slots = asyncio.Semaphore(cfg.workers + cfg.max_queue)
+        self._background = asyncio.Semaphore(
+            max(1, cfg.workers - cfg.interactive_reserve)
+        )
+
+        self.waiting = 0
+        self.submitted = 0
+        self._waits: deque[float] = deque(maxlen=100)
+        self._runs: deque[float] = deque(maxlen=100)
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+
+        cfg = settings.cpu_pool
+        if cfg.kind == "process":
+            # Forking a process with running threads and event loop is unsafe
+            self._executor = ProcessPoolExecutor(
+                cfg.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                cfg.workers, thread_name_prefix="cpu-pool"
+            )
+        logger.info(f"Started {cfg.kind} pool with {cfg.workers} workers")
+
+    def close(self) -> None:
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    @property
+    def metrics(self) -> dict[str, float]:
+        def avg_ms(samples: deque[float]) -> float:
+            return round(sum(samples) / len(samples) * 1000, 1) if samples else 0.0
+
+        return {
+            "waiting": self.waiting,
+            "submitted": self.submitted,
+            "avg_wait_ms": avg_ms(self._waits),
+            "avg_run_ms": avg_ms(self._runs),
+        }
+
+    async def run(
+        self,
+        fn: Callable[..., T],
+        *args,
+        priority: Priority = "interactive",
+        **kwargs,
+    ) -> T:
+        """
+        Run `fn(*args, **kwargs)` in the pool and return its result.
+        With the process pool `fn`, arguments and result must be picklable.
+        """
+        self.start()
+        lane = nullcontext() if priority == "interactive" else self._background
+
+        queued_at = time.monotonic()
+        self.waiting += 1
+        entered = False
+        try:
+            async with lane, self._slots:
+                self.waiting -= 1
+                entered = True
+                self._waits.append(time.monotonic() - queued_at)
+
+                self.submitted += 1
+                started = time.monotonic()
+                try:
+                    result = await asyncio.get_running_loop().run_in_executor(
+                        self._executor, partial(fn, *args, **kwargs)
+                    )
+                finally:
+                    self.submitted -= 1
+                self._runs.append(time.monotonic() - started)
+                return result
+        finally:
+            if not entered:
+                self.waiting -= 1
+
+
+cpu_pool = CpuPool()
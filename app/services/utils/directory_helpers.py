@@ -0,0 +1,51 @@
+import re
+
+# Ukrainian (plus Russian letters users tend to type) to Latin.
+# Both names and queries are transliterated, so Latin input matches too.
+TRANSLIT = str.maketrans(
+    {
+        "а": "a", "б": "b", "в": "v", "г": "h", "ґ": "g", "д": "d", "е": "e",
+        "є": "ie", "ж": "zh", "з": "z", "и": "y", "і": "i", "ї": "i", "й": "i",
+        "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r",
+        "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch",
+        "ш": "sh", "щ": "shch", "ь": "", "ю": "iu", "я": "ia",
+        "ы": "y", "э": "e", "ё": "e", "ъ": "",
+    }
+)
+
+APOSTROPHES = re.compile(r"['’ʼ`‘\"]")
+NON_WORD = re.compile(r"[^\w]+")
+
+# Street types and settlement prefixes, both full and abbreviated
+STREET_TYPES = frozenset(
+    {
+        "вул", "вулиця", "ул", "улица",
+        "просп", "проспект", "пр",
+        "пров", "провулок", "пер", "переулок",
+        "бульв", "бульвар",
+        "пл", "площа", "площадь",
+        "шосе", "тупик", "туп", "проїзд", "узвіз", "алея", "майдан",
+        "набережна", "наб",
+        "м", "с", "смт", "село", "місто",
+    }
+)
+
+
+def normalize_name(text: str | None) -> str:
+    """
+    Normalize street/house name or user query for matching:
+    case, apostrophes, street type prefixes and transliteration.
+    "вул. В'ячеслава Чорновола" -> "viacheslava chornovola"
+    """
+    if not text:
+        return ""
+
+    text = APOSTROPHES.sub("", text.casefold())
+    words = NON_WORD.sub(" ", text).split()
+    words = [w for w in words if w not in STREET_TYPES] or words
+    return " ".join(words).translate(TRANSLIT)
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
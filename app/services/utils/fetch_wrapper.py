@@ -1,117 +1,323 @@
 import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
 
 import httpx
 from config import settings
+from exceptions import ChallengeException, DeadlineExceededException
 from logger import create_logger
 
-from .flare_solver import flare_proxy, solve_challenge
+from .ajax_payload import extract_ajax_payload
+from .cassette import get_cassette, request_key
+from .circuit_breaker import CircuitBreaker
+from .clearance import clearance_manager
+from .concurrency import AdaptiveLimiter, Priority
+from .flare_solver import flare_proxy
+from .http_clients import get_voe_client
+from .mode_selector import Mode, mode_selector
+from .rate_limit import Bucket, acquire_token
+from .retry import backoff_delay, retry_after, retry_budget
 
 logger = create_logger(__name__)
 
-RETRY_STATUSES = {500, 502, 503, 504}
-MAX_RETRIES = 4
-BASE_DELAY = 1.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# An attempt times out this many seconds before the deadline of the call,
+# so that hanging VOE fails as a request the limiter and breaker count
+ATTEMPT_MARGIN = 0.05
+
+
+# Limit concurrent HTTP requests, adapting to upstream latency and errors.
+# FlareSolverr browser handles far fewer requests than VOE itself.
+limiters = {
+    "cookie": AdaptiveLimiter("cookie", **settings.concurrency.cookie.model_dump()),
+    "proxy": AdaptiveLimiter("proxy", **settings.concurrency.proxy.model_dump()),
+}
+
+
+# Whether the current call is waiting for upstream, so that a deadline
+# running out there is told apart from one spent in local queues
+_awaiting_upstream: ContextVar[bool] = ContextVar("awaiting_upstream", default=False)
+
+
+@contextmanager
+def _waiting_for_upstream() -> Iterator[None]:
+    _awaiting_upstream.set(True)
+    try:
+        yield
+    except asyncio.CancelledError:
+        # Deadline of the call ran out right here, keep the mark for it
+        raise
+    except BaseException:
+        _awaiting_upstream.set(False)
+        raise
+    _awaiting_upstream.set(False)
+
+
+def limiter_metrics() -> dict[str, dict[str, float]]:
+    return {mode: limiter.metrics for mode, limiter in limiters.items()}
 
 
 async def _attempt_request(
-    client: httpx.AsyncClient, method, url, headers, params, cookies, data
+    client: httpx.AsyncClient,
+    method,
+    url,
+    headers,
+    params,
+    cookies,
+    data,
+    bucket,
+    priority,
+    deadline,
 ):
-    return await client.request(
-        method=method,
-        url=url,
-        headers=headers,
-        params=params,
-        cookies=cookies,
-        data=data,
-        follow_redirects=True,
-    )
+    await acquire_token(bucket, priority)
+    async with limiters["cookie"].slot(priority) as sample:
+        loop = asyncio.get_running_loop()
+        timeout = min(settings.http.timeout, deadline - loop.time() - ATTEMPT_MARGIN)
+        if timeout <= 0:
+            # Deadline was spent in local queues
+            sample.skipped = True
+            raise TimeoutError
+
+        with _waiting_for_upstream():
+            try:
+                async with asyncio.timeout(timeout):
+                    r = await client.request(
+                        method=method,
+                        url=url,
+                        headers=headers,
+                        params=params,
+                        cookies=cookies,
+                        data=data,
+                        follow_redirects=True,
+                    )
+            except TimeoutError as e:
+                raise httpx.ReadTimeout(
+                    f"{url} did not answer within {timeout:.1f}s"
+                ) from e
+        sample.failed = r.status_code in RETRY_STATUSES
+        return r
+
+
+def _is_voe_failure(e: Exception) -> bool:
+    """VOE answering with a client error is still alive."""
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code >= 500
+    # Deadline may have been spent waiting in local queues
+    if isinstance(e, DeadlineExceededException):
+        return e.upstream
+    return True
 
 
-# Limit concurrent HTTP requests
-http_sem = asyncio.Semaphore(3)
-cf_lock = asyncio.Lock()
+# Shared by schedule and autocomplete fetches
+voe_breaker = CircuitBreaker("voe", is_failure=_is_voe_failure)
 
 
 async def fetch(
-    url: str, params: dict | None = None, data: dict | None = None, method: str = "GET"
+    url: str,
+    params: dict | None = None,
+    data: dict | None = None,
+    method: str = "GET",
+    bucket: Bucket = "autocomplete",
+    priority: Priority = "interactive",
 ):
-    async with http_sem:
-        base_url = settings.fetcher.base_url
+    """
+    Request VOE (directly or through FlareSolverr) and return decoded JSON,
+    which is the same in every mode.
+    Requests of higher `priority` are sent first when upstream is saturated
+    and get a shorter deadline for the whole call, retries included.
+    Raises CircuitOpenException right away while VOE is considered down
+    and DeadlineExceededException if VOE does not answer in time.
+    With a cassette enabled responses are recorded or replayed from it.
+    """
+    cassette = get_cassette()
+    if cassette is None:
+        return await _fetch_live(url, params, data, method, bucket, priority)
+
+    key = request_key(method, url, params, data)
+    if settings.cassette.mode == "replay":
+        return await cassette.replay(key, url)
+    return await cassette.record(
+        key, lambda: _fetch_live(url, params, data, method, bucket, priority)
+    )
+
 
-        if settings.flare.operating_mode == "proxy":
-            return await flare_proxy(
-                f"{base_url}{url}",
+async def _fetch_live(
+    url: str,
+    params: dict | None,
+    data: dict | None,
+    method: str,
+    bucket: Bucket,
+    priority: Priority,
+):
+    timeout = getattr(settings.retry.deadline, priority)
+    deadline = asyncio.get_running_loop().time() + timeout
+    _awaiting_upstream.set(False)
+
+    async with voe_breaker.guard():
+        try:
+            async with asyncio.timeout_at(deadline):
+                mode = mode_selector.choose()
+                if settings.flare.operating_mode == "hybrid":
+                    return await _fetch_hybrid(
+                        mode, url, params, data, method, bucket, priority, deadline
+                    )
+                if mode == "proxy":
+                    return await _fetch_proxy(
+                        url, params, data, method, bucket, priority
+                    )
+                return await _fetch_direct(
+                    url, params, data, method, bucket, priority, deadline
+                )
+        except TimeoutError as e:
+            raise DeadlineExceededException(
+                f"{url} did not answer within {timeout:.0f}s",
+                upstream=_awaiting_upstream.get(),
+            ) from e
+
+
+def _is_challenge_failure(e: Exception) -> bool:
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code == 403
+    return isinstance(e, ChallengeException)
+
+
+async def _fetch_hybrid(
+    mode: Mode,
+    url: str,
+    params: dict | None,
+    data: dict | None,
+    method: str,
+    bucket: Bucket,
+    priority: Priority,
+    deadline: float,
+):
+    """
+    Try the mode picked by the selector, falling back to proxy for this
+    request if the challenge can't be passed directly.
+    """
+    if mode == "cookie":
+        start = time.monotonic()
+        try:
+            result = await _fetch_direct(
+                url, params, data, method, bucket, priority, deadline
+            )
+        except Exception as e:
+            if not _is_challenge_failure(e):
+                raise
+            mode_selector.record("cookie", time.monotonic() - start, False)
+            logger.warning(f"Direct request failed ({e}), falling back to proxy")
+        else:
+            mode_selector.record("cookie", time.monotonic() - start, True)
+            return result
+
+    start = time.monotonic()
+    try:
+        result = await _fetch_proxy(url, params, data, method, bucket, priority)
+    except Exception:
+        mode_selector.record("proxy", time.monotonic() - start, False)
+        raise
+    mode_selector.record("proxy", time.monotonic() - start, True)
+    return result
+
+
+async def _fetch_proxy(
+    url: str,
+    params: dict | None,
+    data: dict | None,
+    method: str,
+    bucket: Bucket,
+    priority: Priority,
+):
+    await acquire_token(bucket, priority)
+    async with limiters["proxy"].slot(priority):
+        with _waiting_for_upstream():
+            res = await flare_proxy(
+                f"{settings.fetcher.base_url}{url}",
                 params=params,
                 data=data,
                 method=method,
             )
+    return extract_ajax_payload(res["solution"]["response"])
 
-        async with httpx.AsyncClient(base_url=base_url, timeout=150) as client:
-            attempt = 0
 
-            while True:
-                cookie = settings.fetcher.cookie
-                headers = settings.fetcher.headers
-                cookies = {"cf_clearance": cookie} if cookie else None
+async def _fetch_direct(
+    url: str,
+    params: dict | None,
+    data: dict | None,
+    method: str,
+    bucket: Bucket,
+    priority: Priority,
+    deadline: float,
+):
+    client = get_voe_client()
+    loop = asyncio.get_running_loop()
+    attempt = 0
+    renewed = False
+    retry_budget.record_request()
 
+    while True:
+        r = None
+        clearance = await clearance_manager.get()
+
+        try:
+            r = await _attempt_request(
+                client,
+                method,
+                url,
+                clearance.headers,
+                params,
+                clearance.cookies,
+                data,
+                bucket,
+                priority,
+                deadline,
+            )
+            # Clearance is normally renewed in background before it expires,
+            # Cloudflare revoking it early is the only case we wait for a solve
+            if r.status_code == 403 and not renewed:
+                logger.info("🔥 Cloudflare challenge detected, renewing clearance…")
                 try:
-                    r = await _attempt_request(
-                        client, method, url, headers, params, cookies, data
-                    )
-                    if r.status_code == 403:
-                        async with cf_lock:
-                            cookie = settings.fetcher.cookie
-                            headers = settings.fetcher.headers
-                            cookies = {"cf_clearance": cookie} if cookie else None
-
-                            r = await _attempt_request(
-                                client, method, url, headers, params, cookies, data
-                            )
-                            if r.status_code != 403:
-                                return r.json()
-
-                            logger.info(
-                                "🔥 Cloudflare challenge detected, using FlareSolverr…"
-                            )
-
-                            full_url = f"{base_url}{url}"
-                            solution = await solve_challenge(full_url)
-
-                            for c in solution["cookies"]:
-                                if c["name"] == "cf_clearance":
-                                    settings.fetcher.cookie = c["value"]
-
-                            if solution["user_agent"]:
-                                settings.fetcher.user_agent = {
-                                    "User-Agent": solution["user_agent"]
-                                }
-                            continue
-
-                    if r.status_code in RETRY_STATUSES:
-                        raise httpx.HTTPStatusError(
-                            "Server error, retrying...", request=r.request, response=r
-                        )
-                    r.raise_for_status()
-                    return r.json()
-
-                except (httpx.TimeoutException, httpx.NetworkError):
-                    err = "network"
-
-                except httpx.HTTPStatusError as e:
-                    if e.response.status_code not in RETRY_STATUSES:
-                        raise
-                    err = f"HTTP {e.response.status_code}"
-
-                attempt += 1
-                if attempt > MAX_RETRIES:
-                    logger.error(f"❌ {url} failed after {MAX_RETRIES} retries ({err})")
-                    raise httpx.HTTPStatusError(
-                        f"Failed after {MAX_RETRIES} retries",
-                        request=r.request,
-                        response=r,
-                    )
-                delay = BASE_DELAY * (2 ** (attempt - 1))
-                logger.warning(
-                    f"Retry {attempt}/{MAX_RETRIES} after {err}, sleeping {delay:.1f}s"
+                    await clearance_manager.renew(clearance)
+                except Exception as e:
+                    raise ChallengeException(f"Failed to renew clearance: {e}") from e
+                renewed = True
+                continue
+
+            if r.status_code in RETRY_STATUSES:
+                raise httpx.HTTPStatusError(
+                    f"VOE answered {r.status_code}", request=r.request, response=r
                 )
-                await asyncio.sleep(delay)
+            r.raise_for_status()
+            return r.json()
+
+        except (httpx.TimeoutException, httpx.NetworkError) as e:
+            err = "network"
+            last_error = e
+
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code not in RETRY_STATUSES:
+                raise
+            err = f"HTTP {e.response.status_code}"
+            last_error = e
+
+        attempt += 1
+        max_retries = settings.retry.max_retries
+        if attempt > max_retries:
+            logger.error(f"❌ {url} failed after {max_retries} retries ({err})")
+            raise last_error
+
+        delay = backoff_delay(attempt, retry_after(r))
+        if loop.time() + delay + ATTEMPT_MARGIN >= deadline:
+            logger.error(f"❌ {url} failed ({err}), no time left to retry")
+            raise last_error
+        if not retry_budget.try_spend():
+            logger.error(f"❌ {url} failed ({err}), retry budget is exhausted")
+            raise last_error
+
+        logger.warning(
+            f"Retry {attempt}/{max_retries} after {err}, sleeping {delay:.1f}s"
+        )
+        await asyncio.sleep(delay)
@@ -0,0 +1,153 @@
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import httpx
+from config import settings
+from logger import create_logger
+
+from .http_clients import get_flare_client
+
+logger = create_logger(__name__)
+
+
+async def flare_command(instance_url: str, payload: dict) -> dict:
+    """
+    Send a command to FlareSolverr instance and return decoded response.
+    """
+    headers = {"Content-Type": "application/json"}
+    r = await get_flare_client().post(instance_url, json=payload, headers=headers)
+    r.raise_for_status()
+    return r.json()
+
+
+class FlareSession:
+    """
+    FlareSolverr browser session. Handles one request at a time.
+    """
+
+    def __init__(self, instance_url: str, name: str) -> None:
+        self.instance_url = instance_url
+        self.name = name
+        self.uses = 0
+        # Requests holding or waiting for the session
+        self.load = 0
+        self.created = False
+        self.lock = asyncio.Lock()
+
+    async def create(self) -> None:
+        await flare_command(
+            self.instance_url, {"cmd": "sessions.create", "session": self.name}
+        )
+        self.created = True
+        self.uses = 0
+        logger.info(f"Created FlareSolverr session {self.name} on {self.instance_url}")
+
+    async def destroy(self) -> None:
+        self.created = False
+        try:
+            await flare_command(
+                self.instance_url, {"cmd": "sessions.destroy", "session": self.name}
+            )
+        except httpx.HTTPError as e:
+            logger.warning(f"Failed to destroy FlareSolverr session {self.name}: {e}")
+
+
+class FlareSessionPool:
+    """
+    Pool of FlareSolverr sessions spread over one or more instances,
+    so that several proxy requests can run in parallel.
+    Sessions are recycled after `max_session_uses` requests
+    and recreated if FlareSolverr lost them.
+    """
+
+    def __init__(self) -> None:
+        cfg = settings.flare
+        urls = cfg.urls or [cfg.url]
+        self.sessions = [
+            FlareSession(urls[i % len(urls)], f"{cfg.session}-{i}")
+            for i in range(cfg.pool_size)
+        ]
+        self._round_robin = itertools.cycle(self.sessions)
+        self._health_task: asyncio.Task | None = None
+
+    def _pick(self) -> FlareSession:
+        if settings.flare.pool_strategy == "round_robin":
+            return next(self._round_robin)
+        return min(self.sessions, key=lambda s: s.load)
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[FlareSession]:
+        session = self._pick()
+        session.load += 1
+        try:
+            async with session.lock:
+                if session.uses >= settings.flare.max_session_uses:
+                    logger.info(f"Recycling FlareSolverr session {session.name}")
+                    await session.destroy()
+                if not session.created:
+                    await session.create()
+
+                session.uses += 1
+                try:
+                    yield session
+                except httpx.HTTPError:
+                    # Browser may be broken, start a fresh one next time
+                    await session.destroy()
+                    raise
+        finally:
+            session.load -= 1
+
+    async def health_check(self) -> None:
+        """
+        Recreate sessions that FlareSolverr does not know about anymore
+        (e.g. after FlareSolverr restart).
+        """
+        for instance_url in {s.instance_url for s in self.sessions}:
+            try:
+                res = await flare_command(instance_url, {"cmd": "sessions.list"})
+            except httpx.HTTPError as e:
+                logger.warning(f"FlareSolverr {instance_url} is unhealthy: {e}")
+                continue
+
+            alive = set(res.get("sessions", []))
+            for session in self.sessions:
+                if session.instance_url == instance_url and session.name not in alive:
+                    session.created = False
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.flare.health_check_interval)
+            try:
+                await self.health_check()
+            except Exception as e:
+                logger.exception("FlareSolverr health check failed %s", e)
+
+    async def start(self) -> None:
+        # In cookie mode sessions only solve an occasional challenge,
+        # they are created on first use then
+        if settings.flare.operating_mode != "cookie":
+            for session in self.sessions:
+                try:
+                    await session.create()
+                except httpx.HTTPError as e:
+                    # Will be created on first use
+                    logger.warning(f"Failed to create session {session.name}: {e}")
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self) -> None:
+        if self._health_task:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+        for session in self.sessions:
+            if session.created:
+                await session.destroy()
+
+
+flare_pool = FlareSessionPool()
@@ -1,10 +1,9 @@
 from urllib.parse import urlencode
 
-import httpx
-from config import settings
 from logger import create_logger
 
-FLARE_URL = settings.flare.url
+from .flare_pool import flare_command, flare_pool
+
 logger = create_logger(__name__)
 
 
@@ -13,20 +12,17 @@ async def solve_challenge(target_url: str):
     Просит FlareSolverr пройти challenge на target_url.
     Возвращает dict: {"cookies": [...], "userAgent": "..."}
     """
-    headers = {"Content-Type": "application/json"}
     payload = {
         "cmd": "request.get",
         "url": target_url,
         "maxTimeout": 150000,
-        "session": settings.flare.session,
         "returnOnlyCookies": True,
         "disableMedia": True,
     }
 
-    async with httpx.AsyncClient(timeout=150) as client:
-        r = await client.post(FLARE_URL, json=payload, headers=headers)
-        r.raise_for_status()
-        res = r.json()
+    async with flare_pool.session() as session:
+        payload["session"] = session.name
+        res = await flare_command(session.instance_url, payload)
 
     if res.get("status") != "ok":
         raise RuntimeError("FlareSolverr failed: " + str(res))
@@ -44,24 +40,18 @@ async def flare_proxy(
     data: dict | None = None,
     method: str = "GET",
 ):
-    headers = {"Content-Type": "application/json"}
-
     if params:
         target_url = f"{target_url}?{urlencode(params)}"
 
     payload = {
         "cmd": f"request.{method.lower()}",
         "url": target_url,
-        "session": settings.flare.session,
         "maxTimeout": 150000,
     }
 
     if method.lower() != "get" and data:
         payload["postData"] = urlencode(data)
 
-    async with httpx.AsyncClient(timeout=150) as client:
-        r = await client.post(FLARE_URL, json=payload, headers=headers)
-        r.raise_for_status()
-        res = r.json()
-
-    return res
+    async with flare_pool.session() as session:
+        payload["session"] = session.name
+        return await flare_command(session.instance_url, payload)
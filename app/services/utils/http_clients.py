@@ -0,0 +1,89 @@
+import asyncio
+
+import httpx
+from config import settings
+from logger import create_logger
+
+logger = create_logger(__name__)
+
+# One long-lived client per upstream, created on bot startup
+_voe_client: httpx.AsyncClient | None = None
+_flare_client: httpx.AsyncClient | None = None
+
+
+def _build_client(**kwargs) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=settings.http.http2,
+        timeout=settings.http.timeout,
+        limits=httpx.Limits(
+            max_connections=settings.http.max_connections,
+            max_keepalive_connections=settings.http.max_keepalive_connections,
+            keepalive_expiry=settings.http.keepalive_expiry,
+        ),
+        **kwargs,
+    )
+
+
+def get_voe_client() -> httpx.AsyncClient:
+    """
+    Shared client for direct requests to VOE.
+    Created lazily if startup hook was not called (e.g. in scripts).
+    """
+    global _voe_client
+    if _voe_client is None or _voe_client.is_closed:
+        _voe_client = _build_client(base_url=settings.fetcher.base_url)
+    return _voe_client
+
+
+def get_flare_client() -> httpx.AsyncClient:
+    """
+    Shared client for requests to FlareSolverr.
+    """
+    global _flare_client
+    if _flare_client is None or _flare_client.is_closed:
+        _flare_client = _build_client()
+    return _flare_client
+
+
+async def _prewarm(client: httpx.AsyncClient, url: httpx.URL) -> None:
+    """
+    Resolve DNS and open a keep-alive connection so the first real
+    request does not pay for the TCP/TLS handshake.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+        port = url.port or (443 if url.scheme == "https" else 80)
+        await loop.getaddrinfo(url.host, port)
+        await client.head(url)
+        logger.info(f"Prewarmed connection to {url.host}")
+    except (OSError, httpx.HTTPError) as e:
+        logger.warning(f"Failed to prewarm connection to {url.host}: {e}")
+
+
+async def start_http_clients() -> None:
+    voe = get_voe_client()
+    flare = get_flare_client()
+
+    if not settings.http.prewarm:
+        return
+
+    flare_urls = settings.flare.urls or [settings.flare.url]
+    tasks = [
+        _prewarm(flare, httpx.URL(url).copy_with(path="/"))
+        for url in dict.fromkeys(flare_urls)
+    ]
+    # In proxy mode VOE is never requested directly
+    if settings.flare.operating_mode != "proxy":
+        tasks.append(_prewarm(voe, voe.base_url))
+    await asyncio.gather(*tasks)
+
+
+async def close_http_clients() -> None:
+    global _voe_client, _flare_client
+
+    for client in (_voe_client, _flare_client):
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
+    _voe_client = None
+    _flare_client = None
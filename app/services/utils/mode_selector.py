@@ -0,0 +1,123 @@
+import time
+from collections import deque
+from typing import Literal
+
+from config import settings
+from logger import create_logger
+
+logger = create_logger(__name__)
+
+Mode = Literal["cookie", "proxy"]
+
+
+class ModeStats:
+    """Latency and success rate of the recent requests made in one mode."""
+
+    def __init__(self) -> None:
+        self._samples: deque[tuple[float, bool]] = deque(
+            maxlen=settings.hybrid.window
+        )
+
+    def record(self, latency: float, ok: bool) -> None:
+        self._samples.append((latency, ok))
+
+    def reset(self) -> None:
+        self._samples.clear()
+
+    @property
+    def count(self) -> int:
+        return len(self._samples)
+
+    @property
+    def success_rate(self) -> float:
+        if not self._samples:
+            return 1.0
+        return sum(1 for _, ok in self._samples if ok) / len(self._samples)
+
+    @property
+    def avg_latency(self) -> float:
+        latencies = [lat for lat, ok in self._samples if ok]
+        return sum(latencies) / len(latencies) if latencies else 0.0
+
+    @property
+    def cost(self) -> float:
+        """Expected seconds per successful request."""
+        return self.avg_latency / max(self.success_rate, 0.01)
+
+    @property
+    def metrics(self) -> dict[str, float]:
+        return {
+            "samples": self.count,
+            "success_rate": round(self.success_rate, 2),
+            "avg_latency": round(self.avg_latency, 2),
+        }
+
+
+class ModeSelector:
+    """
+    Picks the mode for each request in hybrid mode.
+
+    Direct (cookie) requests are preferred. Proxy is used once direct requests
+    keep failing the challenge or cost more than proxy ones; meanwhile a direct
+    probe is sent every `probe_interval` and its success switches back.
+    """
+
+    def __init__(self) -> None:
+        self.stats: dict[Mode, ModeStats] = {
+            "cookie": ModeStats(),
+            "proxy": ModeStats(),
+        }
+        self._preferred: Mode = "cookie"
+        self._last_probe = 0.0
+
+    @property
+    def metrics(self) -> dict[str, dict[str, float] | str]:
+        return {
+            "preferred": self._preferred,
+            **{mode: stats.metrics for mode, stats in self.stats.items()},
+        }
+
+    def _direct_is_worse(self) -> bool:
+        cfg = settings.hybrid
+        cookie, proxy = self.stats["cookie"], self.stats["proxy"]
+        if cookie.count < cfg.min_samples:
+            return False
+        if cookie.success_rate < cfg.min_success_rate:
+            return True
+        return proxy.count >= cfg.min_samples and cookie.cost > proxy.cost
+
+    def choose(self) -> Mode:
+        mode = settings.flare.operating_mode
+        if mode != "hybrid":
+            return mode
+
+        if self._preferred == "proxy":
+            now = time.monotonic()
+            if now - self._last_probe >= settings.hybrid.probe_interval:
+                self._last_probe = now
+                logger.debug("Probing direct requests")
+                return "cookie"
+        return self._preferred
+
+    def record(self, mode: Mode, latency: float, ok: bool) -> None:
+        self.stats[mode].record(latency, ok)
+
+        if self._preferred == "cookie" and self._direct_is_worse():
+            self._switch("proxy")
+            self._last_probe = time.monotonic()
+        elif self._preferred == "proxy" and mode == "cookie" and ok:
+            # Old failures no longer describe direct requests
+            self.stats["cookie"].reset()
+            self.stats["cookie"].record(latency, ok)
+            self._switch("cookie")
+
+    def _switch(self, mode: Mode) -> None:
+        logger.warning(
+            f"Switching to {mode} requests, "
+            f"cookie {self.stats['cookie'].metrics}, "
+            f"proxy {self.stats['proxy'].metrics}"
+        )
+        self._preferred = mode
+
+
+mode_selector = ModeSelector()
@@ -0,0 +1,42 @@
+import asyncio
+from typing import Literal
+
+from config import settings
+from logger import create_logger
+from redis.exceptions import RedisError
+
+from .concurrency import Priority
+
+logger = create_logger(__name__)
+
+Bucket = Literal["schedule", "autocomplete"]
+
+
+async def acquire_token(bucket: Bucket, priority: Priority = "interactive") -> None:
+    """
+    Wait for a token from the cluster-wide bucket before an upstream request.
+    A few tokens are reserved for interactive requests.
+    If Redis is unavailable the request is let through.
+    """
+    if not settings.rate_limit.enabled:
+        return
+
+    # storage imports services.models, so import it lazily to avoid a cycle
+    from storage import rate_limit_storage
+
+    cfg = getattr(settings.rate_limit, bucket)
+    reserve = 0 if priority == "interactive" else cfg.interactive_reserve
+    while True:
+        try:
+            wait = await rate_limit_storage.take_token(
+                bucket, cfg.rate, cfg.burst, reserve
+            )
+        except RedisError as e:
+            logger.warning(f"Rate limit bucket {bucket} is unavailable: {e}")
+            return
+
+        if wait <= 0:
+            return
+
+        logger.debug(f"Rate limit bucket {bucket} is empty, waiting {wait:.2f}s")
+        await asyncio.sleep(wait)
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Literal
 
 from PIL import ImageDraw, ImageFont, Image
@@ -19,6 +20,66 @@ def half_color(h: HalfCell | FullCell) -> tuple[int, int, int]:
     return settings.renderer.color_ok
 
 
+@lru_cache(maxsize=64)
+def load_font(path: str, size: int) -> ImageFont.FreeTypeFont:
+    """
+    Font of the given size, loaded from disk once per process.
+    """
+    return ImageFont.truetype(path, size)
+
+
+# Wrapped lines, their heights and total height of a text
+Layout = tuple[tuple[str, ...], float, tuple[float, ...]]
+
+
+@lru_cache(maxsize=4096)
+def layout_text(
+    text: str,
+    font_path: str,
+    font_size: int,
+    mode: str,
+    width: float,
+    line_spacing: int,
+) -> Layout:
+    """
+    Wrap the text to `width` and measure it, same as ImageDraw would on
+    an image of `mode`. Schedule images repeat the same hours and labels,
+    so the result is cached.
+    """
+    font = load_font(font_path, font_size)
+    lines = tuple(_wrap_text(text, font, mode, width))
+
+    heights = []
+    for line in lines:
+        bbox = font.getbbox(line, mode, anchor="mt")
+        heights.append(bbox[3] - bbox[1])
+
+    total_h = sum(heights) + line_spacing * (len(lines) - 1)
+    return lines, total_h, tuple(heights)
+
+
+def _wrap_text(text: str, font: ImageFont.FreeTypeFont, mode: str, width: float):
+    lines = []
+    for block in text.split("\n"):
+        words = block.split()
+        if not words:
+            lines.append("")
+            continue
+
+        current = ""
+        for w in words:
+            test = (current + " " + w).strip()
+            if font.getlength(test, mode) <= width:
+                current = test
+            else:
+                if current:
+                    lines.append(current)
+                current = w
+        if current:
+            lines.append(current)
+    return lines
+
+
 class TextBox:
     def __init__(
         self,
@@ -61,28 +122,9 @@ class TextBox:
         self.inner_height = height - padding_top - padding_bottom
 
     def draw_text(self, text: str):
-        font_size = self.max_font_size
-        total_h = 0
-        lines = []
-        heights = []
-        font = None
-
-        # Determine font size that fits in the box
-        while font_size >= self.min_font_size:
-            font = ImageFont.truetype(self.font_path, font_size)
-            lines = self._wrap_text(text, font)
-            total_h, max_w, heights = self._measure_lines(lines, font)
-
-            if total_h <= self.inner_height:
-                break
-
-            font_size -= 1
-
-        # If we exit the loop without finding a fitting size, use min_font_size
-        if font_size < self.min_font_size:
-            font = ImageFont.truetype(self.font_path, self.min_font_size)
-            lines = self._wrap_text(text, font)
-            total_h, max_w, heights = self._measure_lines(lines, font)
+        font_size = self._fit_font_size(text)
+        font = load_font(self.font_path, font_size)
+        lines, total_h, heights = self._layout(text, font_size)
 
         # Vertical alignment
         if self.valign == "center":
@@ -112,16 +154,9 @@ class TextBox:
             y += h + self.line_spacing
             
     def render_text_mask(self, text: str) -> Image.Image:
-        font_size = self.max_font_size
-        font = None
-
-        while font_size >= self.min_font_size:
-            font = ImageFont.truetype(self.font_path, font_size)
-            lines = self._wrap_text(text, font)
-            total_h, max_w, heights = self._measure_lines(lines, font)
-            if total_h <= self.inner_height:
-                break
-            font_size -= 1
+        font_size = self._fit_font_size(text)
+        font = load_font(self.font_path, font_size)
+        lines, total_h, heights = self._layout(text, font_size)
 
         mask = Image.new("L", (int(self.width), int(self.height)), 0)
         mask_draw = ImageDraw.Draw(mask)
@@ -136,38 +171,27 @@ class TextBox:
 
         return mask
 
-    def _wrap_text(self, text: str, font: ImageFont.FreeTypeFont):
-        lines = []
-        for block in text.split("\n"):
-            words = block.split()
-            if not words:
-                lines.append("")
-                continue
-
-            current = ""
-            for w in words:
-                test = (current + " " + w).strip()
-                if self._draw.textlength(test, font) <= self.inner_width:
-                    current = test
-                else:
-                    if current:
-                        lines.append(current)
-                    current = w
-            if current:
-                lines.append(current)
-        return lines
-
-    def _measure_lines(self, lines: list[str], font: ImageFont.FreeTypeFont):
-        heights = []
-        widths = []
-
-        for line in lines:
-            bbox = self._draw.textbbox((0, 0), line, font=font, anchor="mt")
-            w = bbox[2] - bbox[0]
-            h = bbox[3] - bbox[1]
-            heights.append(h)
-            widths.append(w)
-
-        total_h = sum(heights) + self.line_spacing * (len(lines) - 1)
-        max_w = max(widths) if widths else 0
-        return total_h, max_w, heights
\ No newline at end of file
+    def _fit_font_size(self, text: str) -> int:
+        """
+        Largest font size at which the wrapped text fits the box height,
+        `min_font_size` if none does. Height grows with the size, so the
+        size is found by binary search.
+        """
+        low, high = self.min_font_size, self.max_font_size
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self._layout(text, mid)[1] <= self.inner_height:
+                low = mid
+            else:
+                high = mid - 1
+        return low
+
+    def _layout(self, text: str, font_size: int) -> Layout:
+        return layout_text(
+            text,
+            self.font_path,
+            font_size,
+            self._draw.mode,
+            self.inner_width,
+            self.line_spacing,
+        )
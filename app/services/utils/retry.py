@@ -0,0 +1,87 @@
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+from config import settings
+from logger import create_logger
+
+logger = create_logger(__name__)
+
+
+class RetryBudget:
+    """
+    Allow retries only while they stay a small share of all recent requests,
+    so that retries don't multiply the load on an upstream that is already
+    failing. A few retries are always allowed when traffic is low.
+    """
+
+    def __init__(self) -> None:
+        self._requests: deque[float] = deque()
+        self._retries: deque[float] = deque()
+
+    def _trim(self, now: float) -> None:
+        window_start = now - settings.retry.budget_window
+        for events in (self._requests, self._retries):
+            while events and events[0] < window_start:
+                events.popleft()
+
+    def record_request(self) -> None:
+        self._requests.append(time.monotonic())
+
+    def try_spend(self) -> bool:
+        """Take one retry from the budget, return False if it is exhausted."""
+        cfg = settings.retry
+        now = time.monotonic()
+        self._trim(now)
+
+        allowed = max(cfg.budget_min_retries, cfg.budget_ratio * len(self._requests))
+        if len(self._retries) >= allowed:
+            return False
+        self._retries.append(now)
+        return True
+
+    @property
+    def metrics(self) -> dict[str, float]:
+        self._trim(time.monotonic())
+        return {"requests": len(self._requests), "retries": len(self._retries)}
+
+
+def retry_after(response: httpx.Response | None) -> float | None:
+    """Seconds from the Retry-After header (delta-seconds or HTTP date)."""
+    if response is None:
+        return None
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    # "-0000" zone gives a naive datetime, it is UTC all the same
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, server_delay: float | None = None) -> float:
+    """
+    Full-jitter exponential backoff for the given retry attempt (from 1),
+    never shorter than what the server asked for.
+    """
+    cfg = settings.retry
+    cap = min(cfg.max_delay, cfg.base_delay * 2 ** (attempt - 1))
+    delay = random.uniform(0, cap)
+    if server_delay is not None:
+        delay = max(delay, server_delay)
+    return delay
+
+
+retry_budget = RetryBudget()
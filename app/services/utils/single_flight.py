@@ -0,0 +1,115 @@
+import asyncio
+import json
+from typing import Any, Awaitable, Callable
+from uuid import uuid4
+
+from config import settings
+from logger import create_logger
+from redis.exceptions import RedisError
+
+from .concurrency import PRIORITIES, Priority
+
+logger = create_logger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one upstream request.
+
+    Callers in the same process await one shared task. Other replicas are
+    coordinated through a short Redis lock: the lock owner does the request
+    and hands the JSON result off, the rest wait for it instead of fetching.
+
+    Callers only join requests of the same or a more urgent priority,
+    so a user tap never waits in the queue of a background request.
+    """
+
+    def __init__(self, namespace: str) -> None:
+        self.namespace = namespace
+        self._inflight: dict[str, tuple[asyncio.Task, Priority]] = {}
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        priority: Priority = "interactive",
+    ) -> Any:
+        """
+        Run `fn`, which must request upstream with `priority`,
+        or join an in-flight call with the same key.
+        """
+        inflight = self._inflight.get(key)
+        rank = PRIORITIES.index
+        if inflight is not None and rank(inflight[1]) <= rank(priority):
+            task = inflight[0]
+            logger.debug(f"Joined in-flight request {self.namespace}:{key}")
+        else:
+            task = asyncio.create_task(self._run_shared(key, fn, priority))
+            self._inflight[key] = (task, priority)
+            task.add_done_callback(lambda t: self._forget(key, t))
+
+        # Shield so that a cancelled caller does not cancel the others
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight[0] is task:
+            del self._inflight[key]
+        # Mark exception as retrieved if every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def _run_shared(
+        self, key: str, fn: Callable[[], Awaitable[Any]], priority: Priority
+    ) -> Any:
+        if not settings.coalescing.shared:
+            return await fn()
+
+        # storage imports services.models, so import it lazily to avoid a cycle
+        from storage import flight_storage
+
+        cfg = settings.coalescing
+        flight_key = f"{self.namespace}:{key}"
+        # Result of any priority will do, the request is only left
+        # to a replica doing it with the same priority
+        lock_key = f"{flight_key}:{priority}"
+        token = uuid4().hex
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + cfg.lock_ttl
+        owner = False
+
+        try:
+            while True:
+                cached = await flight_storage.get_result(flight_key)
+                if cached is not None:
+                    logger.debug(f"Got handed off result for {flight_key}")
+                    return json.loads(cached)
+
+                if await flight_storage.acquire(lock_key, token, cfg.lock_ttl):
+                    owner = True
+                    break
+
+                # Another replica seems stuck, do the request ourselves
+                if loop.time() >= deadline:
+                    break
+
+                await asyncio.sleep(cfg.poll_interval)
+        except RedisError as e:
+            logger.warning(f"Redis is unavailable for {flight_key}, fetching: {e}")
+            return await fn()
+
+        try:
+            result = await fn()
+            try:
+                await flight_storage.set_result(
+                    flight_key, json.dumps(result), cfg.result_ttl
+                )
+            except RedisError as e:
+                logger.warning(f"Failed to hand off result for {flight_key}: {e}")
+            return result
+        finally:
+            if owner:
+                try:
+                    await flight_storage.release(lock_key, token)
+                except RedisError as e:
+                    logger.warning(f"Failed to release lock for {flight_key}: {e}")
@@ -2,18 +2,26 @@ from aiogram.fsm.storage.redis import RedisStorage
 from config import settings
 from redis.asyncio import BlockingConnectionPool, Redis
 
+from .autocomplete_storage import AutocompleteStorage
+from .circuit_storage import CircuitStorage
+from .clearance_storage import ClearanceStorage
+from .directory_storage import DirectoryStorage
+from .flight_storage import FlightStorage
+from .queue_storage import QueueStorage
+from .rate_limit_storage import RateLimitStorage
+from .schedule_storage import ScheduleStorage
 from .subscription_storage import SubscriptionStorage
 from .user_storage import UserStorage
 
 
-def create_redis_client() -> Redis:
+def create_redis_client(decode_responses: bool = True) -> Redis:
     connection_pool = BlockingConnectionPool(
         host=settings.redis.host,
         port=settings.redis.port,
         db=settings.redis.db,
         password=settings.redis.password,
         username=settings.redis.username,
-        decode_responses=True,
+        decode_responses=decode_responses,
         max_connections=25,
         timeout=2,
     )
@@ -26,10 +34,20 @@ def create_storage(redis: Redis):
 
 
 _redis = create_redis_client()
+# For binary values (encoded schedules)
+_redis_bytes = create_redis_client(decode_responses=False)
 
 fsm_storage = create_storage(_redis)
 user_storage = UserStorage(_redis)
 subscription_storage = SubscriptionStorage(_redis)
+flight_storage = FlightStorage(_redis)
+queue_storage = QueueStorage(_redis)
+autocomplete_storage = AutocompleteStorage(_redis)
+directory_storage = DirectoryStorage(_redis)
+rate_limit_storage = RateLimitStorage(_redis)
+circuit_storage = CircuitStorage(_redis)
+clearance_storage = ClearanceStorage(_redis)
+schedule_storage = ScheduleStorage(_redis_bytes)
 
 
 __all__ = [
@@ -38,4 +56,12 @@ __all__ = [
     "user_storage",
     "subscription_storage",
     "fsm_storage",
+    "flight_storage",
+    "queue_storage",
+    "autocomplete_storage",
+    "directory_storage",
+    "rate_limit_storage",
+    "circuit_storage",
+    "clearance_storage",
+    "schedule_storage",
 ]
@@ -0,0 +1,25 @@
+from redis.asyncio import Redis
+
+
+class AutocompleteStorage:
+    """
+    Shared cache for city/street/house autocomplete answers.
+
+    Keys:
+    - autocomplete:{kind}:{parent_id}:{query} = JSON list returned by VOE (STR, TTL)
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self.r = redis
+
+    @staticmethod
+    def _key(kind: str, parent_id: int | None, query: str) -> str:
+        return f"autocomplete:{kind}:{parent_id}:{query}"
+
+    async def get(self, kind: str, parent_id: int | None, query: str) -> str | None:
+        return await self.r.get(self._key(kind, parent_id, query))
+
+    async def set(
+        self, kind: str, parent_id: int | None, query: str, value: str, ttl: int
+    ) -> None:
+        await self.r.set(self._key(kind, parent_id, query), value, ex=ttl)
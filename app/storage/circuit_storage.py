@@ -0,0 +1,26 @@
+from redis.asyncio import Redis
+
+
+class CircuitStorage:
+    """
+    Circuit breaker state shared between replicas.
+
+    Keys:
+    - circuit:{name} = "open" while upstream is considered down (STR, TTL)
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self.r = redis
+
+    @staticmethod
+    def _key(name: str) -> str:
+        return f"circuit:{name}"
+
+    async def set_open(self, name: str, ttl: int) -> None:
+        await self.r.set(self._key(name), "open", ex=ttl)
+
+    async def clear(self, name: str) -> None:
+        await self.r.delete(self._key(name))
+
+    async def is_open(self, name: str) -> bool:
+        return bool(await self.r.exists(self._key(name)))
@@ -0,0 +1,36 @@
+from redis.asyncio import Redis
+
+
+class ClearanceStorage:
+    """
+    Cloudflare clearance shared between replicas.
+
+    Keys:
+    - clearance:{name} = cf_clearance cookie, user agent it was issued for
+      and unix time it expires at (HASH, expires with the clearance)
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self.r = redis
+
+    @staticmethod
+    def _key(name: str) -> str:
+        return f"clearance:{name}"
+
+    async def get(self, name: str) -> dict[str, str] | None:
+        data = await self.r.hgetall(self._key(name))
+        return data or None
+
+    async def set(
+        self, name: str, cookie: str, user_agent: str | None, expires_at: float
+    ) -> None:
+        key = self._key(name)
+        mapping = {"cookie": cookie, "expires_at": str(expires_at)}
+        if user_agent:
+            mapping["user_agent"] = user_agent
+
+        async with self.r.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping=mapping)
+            pipe.expireat(key, int(expires_at))
+            await pipe.execute()
@@ -0,0 +1,89 @@
+import inspect
+from typing import Literal
+
+from redis.asyncio import Redis
+
+DirectoryKind = Literal["streets", "houses"]
+
+
+class DirectoryStorage:
+    """
+    Crawled street and house directory.
+
+    Keys:
+    - directory:streets:{city_id} = street_id -> name (HASH)
+    - directory:houses:{street_id} = house_id -> name (HASH)
+    - directory:crawled:{kind} = parent_id -> unix time of the last crawl (HASH)
+    - directory:incomplete:{kind} = parents whose crawl hit the prefix limit (SET)
+    - directory:pending = street ids users searched houses in, crawled first (SET)
+    """
+
+    PENDING_KEY = "directory:pending"
+
+    def __init__(self, redis: Redis) -> None:
+        self.r = redis
+
+    @staticmethod
+    def _items_key(kind: DirectoryKind, parent_id: int) -> str:
+        return f"directory:{kind}:{parent_id}"
+
+    @staticmethod
+    def _crawled_key(kind: DirectoryKind) -> str:
+        return f"directory:crawled:{kind}"
+
+    @staticmethod
+    def _incomplete_key(kind: DirectoryKind) -> str:
+        return f"directory:incomplete:{kind}"
+
+    async def get_items(self, kind: DirectoryKind, parent_id: int) -> dict[int, str]:
+        key = self._items_key(kind, parent_id)
+        if inspect.isawaitable(raw := self.r.hgetall(key)):
+            raw = await raw
+        return {int(item_id): name for item_id, name in raw.items()}
+
+    async def set_items(
+        self,
+        kind: DirectoryKind,
+        parent_id: int,
+        items: dict[int, str],
+        crawled_at: float,
+        complete: bool = True,
+    ) -> None:
+        """
+        Replace all items of the parent and mark it as crawled.
+        An incomplete parent may miss items the crawl couldn't reach.
+        """
+        key = self._items_key(kind, parent_id)
+        pipe = self.r.pipeline()
+        pipe.delete(key)
+        if items:
+            pipe.hset(key, mapping=items)
+        pipe.hset(self._crawled_key(kind), str(parent_id), crawled_at)
+        if complete:
+            pipe.srem(self._incomplete_key(kind), parent_id)
+        else:
+            pipe.sadd(self._incomplete_key(kind), parent_id)
+        await pipe.execute()
+
+    async def is_complete(self, kind: DirectoryKind, parent_id: int) -> bool:
+        key = self._incomplete_key(kind)
+        if inspect.isawaitable(raw := self.r.sismember(key, parent_id)):
+            raw = await raw
+        return not raw
+
+    async def get_crawled_at(self, kind: DirectoryKind) -> dict[int, float]:
+        """
+        Get unix time of the last crawl for every crawled parent.
+        """
+        if inspect.isawaitable(raw := self.r.hgetall(self._crawled_key(kind))):
+            raw = await raw
+        return {int(parent_id): float(ts) for parent_id, ts in raw.items()}
+
+    async def add_pending(self, street_id: int) -> None:
+        if inspect.isawaitable(sadd := self.r.sadd(self.PENDING_KEY, street_id)):
+            await sadd
+
+    async def pop_pending(self, count: int) -> list[int]:
+        if inspect.isawaitable(raw := self.r.spop(self.PENDING_KEY, count)):
+            raw = await raw
+        return [int(x) for x in raw or []]
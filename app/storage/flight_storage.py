@@ -0,0 +1,51 @@
+from redis.asyncio import Redis
+
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class FlightStorage:
+    """
+    Cross-replica coordination for coalesced upstream requests.
+
+    Keys:
+    - flight:lock:{key} = token of the replica doing the request (STR, short TTL)
+    - flight:result:{key} = JSON result handed off to waiting replicas (STR, short TTL)
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self.r = redis
+        self._release = self.r.register_script(_RELEASE_SCRIPT)
+
+    @staticmethod
+    def _lock_key(key: str) -> str:
+        return f"flight:lock:{key}"
+
+    @staticmethod
+    def _result_key(key: str) -> str:
+        return f"flight:result:{key}"
+
+    async def acquire(self, key: str, token: str, ttl: int) -> bool:
+        """
+        Try to become the replica that performs the request.
+        """
+        return bool(await self.r.set(self._lock_key(key), token, nx=True, ex=ttl))
+
+    async def release(self, key: str, token: str) -> None:
+        """
+        Release the lock only if it is still owned by the given token.
+        """
+        await self._release(keys=[self._lock_key(key)], args=[token])
+
+    async def is_locked(self, key: str) -> bool:
+        return bool(await self.r.exists(self._lock_key(key)))
+
+    async def set_result(self, key: str, value: str, ttl: int) -> None:
+        await self.r.set(self._result_key(key), value, ex=ttl)
+
+    async def get_result(self, key: str) -> str | None:
+        return await self.r.get(self._result_key(key))
@@ -0,0 +1,70 @@
+import inspect
+
+from redis.asyncio import Redis
+
+
+class QueueStorage:
+    """
+    Learned index from address to its disconnection queue.
+
+    Keys:
+    - queue:addr = addr_id -> queue name, e.g. "6.2 черга" (HASH)
+    - queue:verified = addr_id -> unix time of the last direct fetch (HASH)
+    """
+
+    QUEUE_KEY = "queue:addr"
+    VERIFIED_KEY = "queue:verified"
+
+    def __init__(self, redis: Redis) -> None:
+        self.r = redis
+
+    async def get_queues(self) -> dict[str, str]:
+        """
+        Get the whole address -> queue index.
+        """
+        if inspect.isawaitable(raw := self.r.hgetall(self.QUEUE_KEY)):
+            raw = await raw
+        return raw
+
+    async def get_verified_at(self) -> dict[str, float]:
+        """
+        Get unix time of the last direct fetch for every indexed address.
+        """
+        if inspect.isawaitable(raw := self.r.hgetall(self.VERIFIED_KEY)):
+            raw = await raw
+        return {addr_id: float(ts) for addr_id, ts in raw.items()}
+
+    async def set_queue(self, addr_id: str, queue: str, verified_at: float) -> str | None:
+        """
+        Store queue for the address after a direct fetch.
+        Returns the previous queue (None if the address was not indexed).
+        """
+        if inspect.isawaitable(old := self.r.hget(self.QUEUE_KEY, addr_id)):
+            old = await old
+
+        pipe = self.r.pipeline()
+        pipe.hset(self.QUEUE_KEY, addr_id, queue)
+        pipe.hset(self.VERIFIED_KEY, addr_id, verified_at)
+        await pipe.execute()
+        return old
+
+    async def mark_verified(self, addr_id: str, verified_at: float) -> None:
+        """
+        Refresh verification time of an indexed address after a direct
+        fetch that found its schedule, and so its queue, unchanged.
+        """
+        if inspect.isawaitable(known := self.r.hexists(self.QUEUE_KEY, addr_id)):
+            known = await known
+        if known:
+            await self.r.hset(self.VERIFIED_KEY, addr_id, verified_at)
+
+    async def forget(self, *addr_ids: str) -> None:
+        """
+        Remove addresses from the index.
+        """
+        if not addr_ids:
+            return
+        pipe = self.r.pipeline()
+        pipe.hdel(self.QUEUE_KEY, *addr_ids)
+        pipe.hdel(self.VERIFIED_KEY, *addr_ids)
+        await pipe.execute()
@@ -0,0 +1,59 @@
+from redis.asyncio import Redis
+
+# Returns seconds to wait before a token is available, 0 if one was taken.
+# Callers with a reserve leave that many tokens for the others.
+# Time comes from Redis itself so that replica clocks don't matter.
+_TAKE_TOKEN_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local reserve = tonumber(ARGV[3])
+
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+local wait = 0
+if tokens >= 1 + reserve then
+    tokens = tokens - 1
+else
+    wait = (1 + reserve - tokens) / rate
+end
+
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("EXPIRE", KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RateLimitStorage:
+    """
+    Cluster-wide token buckets for upstream requests.
+
+    Keys:
+    - ratelimit:{bucket} = tokens left and time of the last refill (HASH, TTL)
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self.r = redis
+        self._take_token = self.r.register_script(_TAKE_TOKEN_SCRIPT)
+
+    @staticmethod
+    def _key(bucket: str) -> str:
+        return f"ratelimit:{bucket}"
+
+    async def take_token(
+        self, bucket: str, rate: float, burst: int, reserve: int = 0
+    ) -> float:
+        """
+        Try to take one token from the bucket, leaving `reserve` tokens in it.
+        Returns 0 on success, otherwise seconds until a token is available.
+        """
+        wait = await self._take_token(
+            keys=[self._key(bucket)], args=[rate, burst, reserve]
+        )
+        return float(wait)
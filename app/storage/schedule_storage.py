@@ -0,0 +1,68 @@
+from redis.asyncio import Redis
+
+# Marks the cached schedule as just fetched if it was parsed from the same
+# VOE answer. Returns 1 if it was, 0 if the cache holds something else.
+_TOUCH_SCRIPT = """
+if redis.call("HGET", KEYS[1], "fingerprint") ~= ARGV[1] then
+    return 0
+end
+redis.call("HSET", KEYS[1], "fetched_at", ARGV[2], "shared", 0)
+redis.call("EXPIRE", KEYS[1], ARGV[3])
+return 1
+"""
+
+
+class ScheduleStorage:
+    """
+    Parsed schedules shared by bot handlers and the notification worker.
+
+    Uses a connection without response decoding, schedules are binary.
+
+    Keys:
+    - schedule:{addr_id} = encoded schedule, unix time it was fetched at,
+      whether it was fetched for another house of the same queue and
+      fingerprint of the VOE answer it was parsed from (HASH, TTL)
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self.r = redis
+        self._touch = self.r.register_script(_TOUCH_SCRIPT)
+
+    @staticmethod
+    def _key(addr_id: str) -> str:
+        return f"schedule:{addr_id}"
+
+    async def get(self, addr_id: str) -> dict[str, bytes] | None:
+        data = await self.r.hgetall(self._key(addr_id))
+        return {k.decode(): v for k, v in data.items()} or None
+
+    async def set(
+        self,
+        addr_id: str,
+        data: bytes,
+        fetched_at: float,
+        shared: bool,
+        ttl: int,
+        fingerprint: str | None = None,
+    ) -> None:
+        key = self._key(addr_id)
+        mapping = {"data": data, "fetched_at": str(fetched_at), "shared": int(shared)}
+        if fingerprint is not None:
+            mapping["fingerprint"] = fingerprint
+        async with self.r.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def touch(
+        self, addr_id: str, fingerprint: str, fetched_at: float, ttl: int
+    ) -> bool:
+        """
+        Mark the cached schedule as fetched at `fetched_at` if it was parsed
+        from the answer with this fingerprint. Return whether it was.
+        """
+        touched = await self._touch(
+            keys=[self._key(addr_id)], args=[fingerprint, str(fetched_at), ttl]
+        )
+        return bool(int(touched))
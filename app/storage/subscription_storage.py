@@ -13,6 +13,8 @@ class SubscriptionStorage:
     Keys:
     - subs:{kind}:addr:{addr_id} = set of user_ids (SET)
     - subs:{kind}:hash:{addr_id} = last hash (STR)
+    - subs:fingerprint:{addr_id} = fingerprint of the VOE answer
+      the last hashes were calculated from (STR)
     """
 
     def __init__(self, redis: Redis) -> None:
@@ -111,6 +113,24 @@ class SubscriptionStorage:
         """
         await self.r.set(self._hash_key(kind, addr_id), value)
 
+    async def get_fingerprint(self, addr_id: str) -> str | None:
+        """
+        Get the fingerprint of the last processed schedule for an address.
+        """
+        return await self.r.get(f"subs:fingerprint:{addr_id}")
+
+    async def set_fingerprint(self, addr_id: str, value: str) -> None:
+        """
+        Set the fingerprint of the last processed schedule for an address.
+        """
+        await self.r.set(f"subs:fingerprint:{addr_id}", value)
+
+    async def clear_fingerprint(self, addr_id: str) -> None:
+        """
+        Forget the fingerprint, so the next fetch of the address is processed.
+        """
+        await self.r.delete(f"subs:fingerprint:{addr_id}")
+
     async def get_subscription_status(
         self, user_id: int, addr_id: str
     ) -> dict[str, bool]:
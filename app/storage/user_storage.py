@@ -3,8 +3,7 @@ import json
 from typing import Optional
 
 from redis.asyncio import Redis
-from services.models import Address
-from pydantic import BaseModel
+from services.models import Address, intern_address
 
 
 class UserStorage:
@@ -68,7 +67,7 @@ class UserStorage:
         addresses: list[Address] = []
         for item in raw_items:
             try:
-                addresses.append(Address.model_validate_json(item))
+                addresses.append(intern_address(Address.model_validate_json(item)))
             except json.JSONDecodeError:
                 continue
         return addresses
@@ -127,18 +126,6 @@ class UserStorage:
         key = self._key(user_id)
         await self.r.delete(key)
 
-    async def set_cached_schedule(self, addr_id: str, data: BaseModel, ttl=3600):
-        await self.r.set(f"schedule:{addr_id}", data.model_dump_json(), ex=ttl)
-
-    async def get_cached_schedule(self, addr_id: str) -> dict | None:
-        raw = await self.r.get(f"schedule:{addr_id}")
-        if not raw:
-            return None
-        try:
-            return json.loads(raw)
-        except json.JSONDecodeError:
-            return None
-
     async def get_all_users_id(self) -> set[int]:
         """
         Get all user IDs who have stored addresses.
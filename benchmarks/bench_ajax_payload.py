@@ -0,0 +1,68 @@
+"""
+Compare extraction of the Drupal AJAX payload from a FlareSolverr page:
+BeautifulSoup tree (previous path) vs single-pass scan (ajax_payload).
+
+    python benchmarks/bench_ajax_payload.py [--number N]
+"""
+
+import argparse
+import html
+import json
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "app"))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from services.utils.ajax_payload import extract_ajax_payload, insert_html  # noqa: E402
+
+RESPONSES = ROOT / "mock_endpoint" / "responses_json"
+
+
+def browser_page(payload: str, tag: str) -> str:
+    """Page as Chrome renders an AJAX response, like FlareSolverr returns it."""
+    return (
+        "<html><head><meta name='color-scheme' content='light dark'></head>"
+        f"<body><{tag}>{html.escape(payload, quote=False)}</{tag}></body></html>"
+    )
+
+
+def bs4_path(page: str):
+    soup = BeautifulSoup(page, "lxml")
+    node = soup.find("textarea") or soup.find("pre")
+    return json.loads(node.text)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    cases = {
+        "schedule (full)": ("graph_full.json", "textarea"),
+        "schedule (empty)": ("graph_empty.json", "textarea"),
+        "autocomplete": ("street.json", "pre"),
+    }
+
+    print(f"{'case':<18} {'size':>8} {'bs4 ms':>8} {'scan ms':>8} {'speedup':>8}")
+    for name, (file, tag) in cases.items():
+        page = browser_page((RESPONSES / file).read_text(encoding="utf-8"), tag)
+
+        expected = bs4_path(page)
+        assert extract_ajax_payload(page) == expected, name
+        if tag == "textarea":
+            insert_html(expected)
+
+        old = timeit.timeit(lambda: bs4_path(page), number=args.number)
+        new = timeit.timeit(lambda: extract_ajax_payload(page), number=args.number)
+        print(
+            f"{name:<18} {len(page):>8} "
+            f"{old / args.number * 1000:>8.3f} {new / args.number * 1000:>8.3f} "
+            f"{old / new:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Latency and memory of the schedule parser on the page corpus
+(schedule_corpus.py), compared with the saved baseline.
+
+    python benchmarks/bench_parser.py [--number N] [--days N]
+    python benchmarks/bench_parser.py --save-baseline
+
+For every page and function it reports time per call, peak traced memory
+during a call and the number of memory blocks still held by the result.
+tracemalloc sees Python allocations only, libxml2 memory is not counted.
+Exits with 1 if any of them got worse than the baseline beyond tolerance.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "app"))
+
+from lxml import etree  # noqa: E402
+from schedule_corpus import build_corpus, synthetic_page  # noqa: E402
+from services.fast_parser import (  # noqa: E402
+    _CONTAINER,
+    _QUEUE_TEXT,
+    pack_days,
+    parse_schedule_fast,
+)
+from services.parser import parse_schedule, parse_schedule_xpath  # noqa: E402
+from services.utils.parser_helpers import current_disconnection_info  # noqa: E402
+
+BASELINE = Path(__file__).resolve().parent / "baselines" / "parser.json"
+ADDRESS = "м. Вінниця, вул. Київська, 1"
+
+
+def cases(page: str) -> dict:
+    """Functions to measure on a page, each called without arguments."""
+    tree = etree.HTML(page)
+    status_nodes = [str(node).strip() for node in _QUEUE_TEXT(tree)][1:]
+    containers = _CONTAINER(tree)
+
+    funcs = {
+        "parse_schedule": lambda: parse_schedule(page, ADDRESS),
+        "parse_schedule_xpath": lambda: parse_schedule_xpath(page, ADDRESS),
+        "parse_schedule_fast": lambda: parse_schedule_fast(page, ADDRESS),
+        "current_disconnection_info": lambda: current_disconnection_info(
+            status_nodes
+        ),
+    }
+    if containers:
+        funcs["pack_days"] = lambda: pack_days(containers[0])
+    return funcs
+
+
+def measure(func, number: int, repeat: int) -> dict[str, float]:
+    func()  # warm up caches before measuring
+
+    best = min(timeit.repeat(func, number=number, repeat=repeat))
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start_size, _ = tracemalloc.get_traced_memory()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del result
+
+    return {
+        "ms": round(best / number * 1000, 4),
+        "peak_kib": round((peak - start_size) / 1024, 1),
+        "blocks": max(0, blocks),
+    }
+
+
+def compare(
+    results: dict, baseline: dict, tolerance: float, memory_tolerance: float
+) -> list[str]:
+    regressions = []
+    for page, funcs in results.items():
+        for name, current in funcs.items():
+            base = baseline.get(page, {}).get(name)
+            if base is None:
+                continue
+            for metric, limit in (
+                ("ms", tolerance),
+                ("peak_kib", memory_tolerance),
+                ("blocks", memory_tolerance),
+            ):
+                # Small absolute noise is not a regression
+                if current[metric] > base[metric] * (1 + limit) + 1:
+                    regressions.append(
+                        f"{page} {name} {metric}: "
+                        f"{base[metric]} -> {current[metric]}"
+                    )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--days", type=int, help="add a synthetic page of N days")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--memory-tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    # Parsers log every day at INFO
+    logging.disable(logging.INFO)
+
+    corpus = build_corpus()
+    if args.days:
+        corpus[f"synthetic/mixed_{args.days}d"] = synthetic_page(args.days)
+
+    baseline = {}
+    if args.baseline.exists() and not args.save_baseline:
+        baseline = json.loads(args.baseline.read_text())["results"]
+
+    results: dict[str, dict] = {}
+    print(
+        f"{'page':<24} {'function':<28} {'ms':>9} {'base ms':>9} "
+        f"{'peak KiB':>9} {'blocks':>7}"
+    )
+    for page_name, page in corpus.items():
+        results[page_name] = {}
+        for name, func in cases(page).items():
+            current = measure(func, args.number, args.repeat)
+            results[page_name][name] = current
+
+            base = baseline.get(page_name, {}).get(name)
+            base_ms = f"{base['ms']:.3f}" if base else "-"
+            print(
+                f"{page_name:<24} {name:<28} {current['ms']:>9.3f} {base_ms:>9} "
+                f"{current['peak_kib']:>9.1f} {current['blocks']:>7}"
+            )
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(
+            json.dumps(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "results": results,
+                },
+                indent=2,
+                ensure_ascii=False,
+            )
+            + "\n"
+        )
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    regressions = compare(
+        results, baseline, args.tolerance, args.memory_tolerance
+    )
+    if regressions:
+        print("\nRegressions against baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
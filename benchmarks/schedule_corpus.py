@@ -0,0 +1,187 @@
+"""
+Schedule pages for the parser benchmarks: real VOE responses from
+mock_endpoint and synthetic pages with the same markup, so that cases the
+mocks don't cover (half hours, outage banners, many days) are measured too.
+
+    python benchmarks/schedule_corpus.py                   # list the corpus
+    python benchmarks/schedule_corpus.py --days 365 --out big.html
+"""
+
+import argparse
+import json
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+RESPONSES = ROOT / "mock_endpoint" / "responses_json"
+
+WEEKDAYS = ["пн", "вт", "ср", "чт", "пт", "сб", "нд"]
+START_DATE = date(2025, 12, 25)
+
+BANNERS = {
+    "none": [
+        "За Вашою адресою наразі не зафіксовано аварійних та планових відключень.",
+    ],
+    "planned": [
+        "За вашою адресою в даний момент відсутня електроенергія",
+        "Причина відключення: Застосування графіків погодинних відключень (ГПВ)",
+        "Час початку – 08:00 2025.12.25",
+        "Орієнтовний час відновлення – до 10:00 2025.12.25",
+    ],
+    "emergency": [
+        "За вашою адресою в даний момент відсутня електроенергія",
+        "Причина відключення: Аварійне відключення",
+        "Час початку – 13:40 2025.12.25",
+        "Орієнтовний час завершення – до 18:00 2025.12.25",
+    ],
+}
+
+# Share of hours of each kind for a pattern: (no outage, full hour, half hour)
+PATTERNS = {
+    "empty": (1, 0, 0),
+    "full": (0, 1, 0),
+    "halves": (1, 0, 2),
+    "mixed": (4, 3, 1),
+}
+
+CONFIRM_CLASSES = ["confirm_0", "confirm_1", "confirm_3", ""]
+FILL_CLASSES = ["confirmed", "", "confirm_1"]
+# --start/--size of partly disconnected hours (first half, second half, middle)
+FILLS = [(0, 50), (50, 50), (20, 70), (10, 30)]
+
+
+def insert_html(file: str) -> str:
+    commands = json.loads((RESPONSES / file).read_text(encoding="utf-8"))
+    return [c for c in commands if c.get("command") == "insert"][0]["data"]
+
+
+def real_pages() -> dict[str, str]:
+    return {
+        "real/graph_full": insert_html("graph_full.json"),
+        "real/graph_empty": insert_html("graph_empty.json"),
+    }
+
+
+def _page_frame() -> tuple[str, str]:
+    """Drupal form around the schedule table, taken from a real response."""
+    page = insert_html("graph_empty.json")
+    start = page.index('<div class="table_wrapper">')
+    end = page.index("<input", start)
+    return page[:start], page[end:]
+
+
+def _day_labels(days: int):
+    day = START_DATE
+    for _ in range(days):
+        # 29.02 can't be parsed when the current year is not a leap one
+        if (day.day, day.month) == (29, 2):
+            day += timedelta(days=1)
+        yield f"{WEEKDAYS[day.weekday()]} {day:%d.%m}"
+        day += timedelta(days=1)
+
+
+def _cell(rng: random.Random, kind: str, day_cls: str) -> str:
+    if kind == "full":
+        confirm = rng.choice(CONFIRM_CLASSES)
+        return (
+            f'<div class="disconnection-detailed-table-cell cell  has_disconnection '
+            f'{confirm} full_hour {day_cls}"><div class="hour_block has_any"></div></div>'
+        )
+    if kind == "half":
+        start, size = rng.choice(FILLS)
+        fill = rng.choice(FILL_CLASSES)
+        return (
+            f'<div class="disconnection-detailed-table-cell cell  has_disconnection '
+            f'{rng.choice(CONFIRM_CLASSES)} {day_cls}"><div class="hour_block has_any">'
+            f'<div class="fill {fill}" style="--start: {start}; --size: {size}">'
+            "</div></div></div>"
+        )
+    return (
+        f'<div class="disconnection-detailed-table-cell cell  no_disconnection '
+        f'{day_cls}"><div class="hour_block"></div></div>'
+    )
+
+
+def synthetic_page(
+    days: int = 2,
+    pattern: str = "mixed",
+    banner: str | None = "none",
+    seed: int = 0,
+) -> str:
+    """
+    Schedule page for `days` days, hours filled according to `pattern`.
+    `banner=None` gives a page without queue info at all.
+    """
+    rng = random.Random(seed)
+    prefix, suffix = _page_frame()
+
+    if banner is None:
+        return prefix + '<div class="table_wrapper"></div>' + suffix
+
+    parts = [
+        '<div class="table_wrapper"><div class="disconnection-detailed-table">',
+        f"<p>{rng.randint(1, 6)}.{rng.randint(1, 2)} черга</p>",
+        '<div class="disconnection-detailed-table-message">',
+        *(f"<p>{line}</p>" for line in BANNERS[banner]),
+        "</div>",
+        '<div class="disconnection-detailed-table-container">',
+        '<div class="disconnection-detailed-table-cell legend"></div>',
+        *(
+            f'<div class="disconnection-detailed-table-cell head">{h:02d}:00</div>'
+            for h in range(24)
+        ),
+    ]
+
+    kinds = ["none", "full", "half"]
+    weights = PATTERNS[pattern]
+    for i, label in enumerate(_day_labels(days)):
+        day_cls = "current_day" if i == 0 else "other_day"
+        parts.append(
+            f'<div class="disconnection-detailed-table-cell legend day_col {day_cls}">'
+            f"{label}</div>"
+        )
+        for kind in rng.choices(kinds, weights, k=24):
+            parts.append(_cell(rng, kind, day_cls))
+
+    parts.append("</div></div></div>")
+    return prefix + "\n".join(parts) + suffix
+
+
+def build_corpus() -> dict[str, str]:
+    """All benchmark pages by name. Synthetic pages are the same on every run."""
+    return {
+        **real_pages(),
+        "synthetic/no_queue": synthetic_page(banner=None),
+        "synthetic/empty_7d": synthetic_page(7, "empty", "none"),
+        "synthetic/full_1d": synthetic_page(1, "full", "planned"),
+        "synthetic/halves_2d": synthetic_page(2, "halves", "none"),
+        "synthetic/emergency_2d": synthetic_page(2, "mixed", "emergency"),
+        "synthetic/mixed_7d": synthetic_page(7, "mixed", "planned"),
+        "synthetic/mixed_60d": synthetic_page(60, "mixed", "none"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, help="generate one synthetic page")
+    parser.add_argument("--pattern", choices=PATTERNS, default="mixed")
+    parser.add_argument("--banner", choices=BANNERS, default="none")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args()
+
+    if args.days is None:
+        for name, page in build_corpus().items():
+            print(f"{name:<24} {len(page):>9}")
+        return
+
+    page = synthetic_page(args.days, args.pattern, args.banner, args.seed)
+    if args.out:
+        args.out.write_text(page, encoding="utf-8")
+    else:
+        print(page)
+
+
+if __name__ == "__main__":
+    main()